@@ -1,7 +1,17 @@
 import numpy as np
 from numpy.typing import NDArray
 import heapq
+import itertools
+import sys
+import time
+from typing import Iterator
 from PegSolitaire import PegSolitaire
+from Boards import Jump
+from Heuristics import CreateHeuristic
+from Pruning import PositionPruning
+from SearchStats import SearchStats
+from PositionCache import PositionCache, DEFAULT_MAX_ENTRIES
+from Rendering import MoveNotation, MoveRecord, WriteJSONLines
 
 # Algoritmo de referencia, tomado de:
 # https://en.wikipedia.org/wiki/A*_search_algorithm
@@ -9,22 +19,30 @@ from PegSolitaire import PegSolitaire
 class AStar_Node():
     """
     Class representing a node in the A* algorithm.
+    The node is kept as small as possible (no board copies): the full boards of a path
+    are rebuilt by replaying the moves from the root.
 
     Attributes:
-        game_state (NDArray): The game state at this node.
+        game_state (int): The game state at this node, packed as a bitboard.
         parent_node (AStar_Node): The parent node of this node.
         g_value (int): The cost from the start node to this node.
         h_value (int): The estimated cost from this node to the goal node.
         f_value (int): The sum of g_value and h_value.
+        previous_move (Jump): The jump made from the parent node to reach this node.
     """
-    def __init__(self, game_state: NDArray, parent_node, g_value: int, h_value: int, previous_move: list[tuple] = None) -> None:
-        self.game_state = game_state.copy()
+    __slots__ = ("game_state", "parent_node", "g_value", "h_value", "previous_move")
+
+    def __init__(self, game_state: int, parent_node, g_value: int, h_value: int, previous_move: Jump = None) -> None:
+        self.game_state = game_state
         self.parent_node = parent_node
         self.previous_move = previous_move
 
         self.g_value = g_value
         self.h_value = h_value
-        self.f_value = self.g_value + self.h_value
+
+    @property
+    def f_value(self) -> int:
+        return self.g_value + self.h_value
 
     def __lt__(self, other):
         return self.f_value < other.f_value
@@ -33,82 +51,112 @@ class AStar_Algorithm(PegSolitaire):
     """
     Class implementing the A* algorithm for the Peg Solitaire game.
 
-    Methods:
-        __calculateHeuristic(x: int, y: int) -> int:
-            Calculates the heuristic value based on the Manhattan distance from a given coordinate to the center of the board.
+    Attributes:
+        heuristic (Heuristic): The heuristic used to guide the search (see Heuristics.HEURISTICS).
+        use_symmetry (bool): If True, the close list stores the canonical form of every state,
+            so the rotated and mirrored copies of an explored state are not explored again.
+        use_pruning (bool): If True, the children that can never reach the goal (see Pruning.PositionPruning)
+            are rejected before being added to the open list.
+        cache_path (str): File of the persistent position cache (see PositionCache), None to disable it.
+        cache_size (int): Maximum number of positions of the cache file (None for no limit).
+        output_format (str): How PrintSolution shows a solution: "boards" (every board), "moves"
+            (standard notation only) or "jsonl" (one JSON object per move).
+        anytimeWeights (list[float]): Weights of the runs of the last Anytime_Search, in order.
 
-        __generateNode(current_piece_coord: tuple[int, int], next_position_coord: tuple[int, int], current_node: AStar_Node) -> AStar_Node:
-            Generates a new node based on moving a piece from a current coordinate to a destination coordinate.
+    Methods:
+        __generateNode(jump: Jump, current_node: AStar_Node, h_value: int) -> AStar_Node:
+            Generates a new node based on making a jump of the board jump table from the current node.
 
         __findPossibleNextMove(current_node: AStar_Node) -> list[AStar_Node]:
             Finds all possible next moves from the current node.
 
-        rootNodeMD(matrix: NDArray) -> int:
-            Calculates the total Manhattan distance from all pieces to the center of the board.
+        FindPossibleMoves(state: int, h_value: int) -> tuple[list[int], list]:
+            Finds the legal (not pruned) moves of a state and scores their children.
+
+        IterChildren(state: int, h_value, path: list[int], stats: SearchStats) -> Iterator[tuple[int, int | float]]:
+            Yields the children of a state from the most promising one, for the depth first searches.
+
+        UpdateDepthFirstStats(stats: SearchStats, table, startTime: float):
+            Updates the table size, pruned nodes and time of a depth first search.
+
+        ExpandBatch(states: NDArray, h_values: NDArray) -> tuple[NDArray, NDArray, NDArray, NDArray]:
+            Expands many states at once with array operations.
 
         A_Star():
             Implements the A* algorithm to find the solution to the Peg Solitaire game.
+
+        Beam_Search():
+            Layer by layer search keeping the best states of every layer, expanded in batches.
+
+        Anytime_Search():
+            Weighted A* with a time or node budget, restarted with lower weights while the budget lasts.
+
+        IterSolution() -> Iterator[tuple[Jump, int]]:
+            Yields the moves of the last solution and the bitboard after every move.
+
+        SolutionMoves() -> Iterator[str]:
+            Yields the moves of the last solution in standard notation.
+
+        PrintSolution(foundPath: list[Jump], stats: SearchStats):
+            Prints a solution (in the output_format) and the statistics of the search.
+
+        PrintNoSolution(stats: SearchStats):
+            Prints that there is no solution and the statistics of the search.
     """
 
-    def __calculateHeuristic(self, x: int, y: int):
+    def __init__(self, board = "english", heuristic = "manhattan", use_symmetry: bool = False, use_pruning: bool = True, cache_path: str = None, output_format: str = "boards", cache_size: int = DEFAULT_MAX_ENTRIES):
         """
-        Calculates the heuristic value based on the Manhattan distance from a given coordinate to the center of the board.
+        Initializes the A* algorithm.
 
         Parameters:
-            x (int): The x coordinate.
-            y (int): The y coordinate.
-
-        Returns:
-            int: The heuristic value.
+            board (str | list[str] | NDArray): The name of the board (see Boards.BOARDS) or a custom mask.
+            heuristic (str | Heuristic): The name of the heuristic (see Heuristics.HEURISTICS) or a heuristic object.
+            use_symmetry (bool): Reduce the explored states by the symmetries of the board (opt-in).
+            use_pruning (bool): Reject the children that can never reach the goal.
+            cache_path (str): File of the persistent position cache, shared between runs (optional).
+            output_format (str): "boards", "moves" or "jsonl", see PrintSolution.
+            cache_size (int): Maximum number of positions of the cache file, the least useful ones are evicted (None for no limit).
         """
-        return abs( self.CENTER_Y - y ) + abs( self.CENTER_X - x )
-
-    def __generateNode(self, current_piece_coord: tuple[int, int], next_position_coord: tuple[int, int], current_node: AStar_Node):
+        super().__init__(board)
+        self.heuristic = CreateHeuristic(heuristic, self)
+        self.use_symmetry = use_symmetry
+        self.use_pruning = use_pruning
+        self.pruning: PositionPruning = None
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+        self.output_format = output_format
+        self.solution: list[ Jump ] = None
+        self.bestNode: AStar_Node = None
+        self.bestPath: list[ Jump ] = None
+        self.anytimeWeights: list[ float ] = []
+
+        # Symmetric copies of a state are only merged when the heuristic can not tell them apart
+        self.RestrictSymmetries(self.heuristic.IsInvariant)
+
+    def __generateNode(self, jump: Jump, current_node: AStar_Node, h_value: int):
         """
-        Generates a new node based on moving a piece from a current coordinate to a destination coordinate.
+        Generates a new node based on making a jump of the board jump table from the current node.
+        The jump must be legal in the current node (see __findPossibleNextMove).
 
         Parameters:
-            current_piece_coord (tuple[int, int]): Coordinates of the current piece.
-            next_position_coord (tuple[int, int]): Coordinates of the destination position.
+            jump (Jump): The jump made (from, over and to holes).
             current_node (AStar_Node): The current node.
+            h_value (int): The heuristic value of the new node.
 
         Returns:
             AStar_Node: The newly generated node.
         """
-        # Set the coord of the piece destiny
-        coord_destiny_x = next_position_coord[1]
-        coord_destiny_y = next_position_coord[0]
-
-        # Set the coord of the piece current position
-        piece_coord_x = current_piece_coord[0]
-        piece_coord_y = current_piece_coord[1]
-
-        # Get the piece in between the current piece and the destiny
-        target_piece = self.GetPieceInBetween(piece_coord_x, piece_coord_y, coord_destiny_x, coord_destiny_y)
-        target_x = target_piece[1]
-        target_y = target_piece[0]
-
-        # Make the move of the piece and get the new game board state
-        next_game_board = self.MakeMove(piece_coord_x, piece_coord_y, coord_destiny_x, coord_destiny_y, current_node.game_state.copy())
-        if (next_game_board is not None):
-            # Calculate the new g, h and f values for the new node
-            new_gValue = current_node.g_value + 1
-            new_hValue = current_node.h_value
+        # Make the move of the piece: the from and over holes are emptied and the to hole is filled
+        next_game_board = current_node.game_state ^ jump.move_mask
 
-            new_hValue -= self.__calculateHeuristic(piece_coord_x, piece_coord_y)
-            new_hValue -= self.__calculateHeuristic(target_x, target_y)
-            new_hValue += self.__calculateHeuristic(coord_destiny_x, coord_destiny_y)
-
-            # Create and return the new node
-            new_node = AStar_Node(next_game_board.copy(), current_node, new_gValue, new_hValue, [(piece_coord_x, piece_coord_y), (coord_destiny_x, coord_destiny_y)])
-            return new_node
-
-        # If the move is invalid := Return none (Did not create any node)
-        return None
+        # Create and return the new node (only the move is stored, not the board)
+        return AStar_Node(next_game_board, current_node, current_node.g_value + 1, h_value, jump)
 
     def __findPossibleNextMove(self, current_node: AStar_Node) -> list[ AStar_Node ]:
         """
         Finds all possible next moves from the current node.
+        Only the precomputed jump table of the board is checked, so the jumps that would
+        leave the board are never considered.
 
         Parameters:
             current_node (AStar_Node): The current node.
@@ -116,134 +164,602 @@ class AStar_Algorithm(PegSolitaire):
         Returns:
             list[AStar_Node]: A list of possible next nodes.
         """
-        result = []
-        x, y = 0, 0
+        moves, h_values = self.FindPossibleMoves(current_node.game_state, current_node.h_value)
 
-        # Iterate through the game board
-        for _ in range(self.GAME_SIZE * self.GAME_SIZE):
+        return [ self.__generateNode(self.jumps[index], current_node, h_value) for index, h_value in zip(moves, h_values) ]
+
+    def FindPossibleMoves(self, state: int, h_value) -> tuple[list[int], list]:
+        """
+        Finds the legal moves of a state that are not rejected by the pruning rules, and scores their children.
 
-            # Check if there is a piece in the current location
-            if current_node.game_state[y, x] == 1:
-                possible_moves = self.GetPiecePossibleNextPositions(x, y)
+        Parameters:
+            state (int): The bitboard.
+            h_value (int | float): The heuristic value of the state.
 
-                # Create 4 nodes based on the possible moves
-                node1 = self.__generateNode( (x, y), possible_moves[0], current_node )
-                node2 = self.__generateNode( (x, y), possible_moves[1], current_node )
-                node3 = self.__generateNode( (x, y), possible_moves[2], current_node )
-                node4 = self.__generateNode( (x, y), possible_moves[3], current_node )
+        Returns:
+            tuple[list[int], list]: The index in the jump table of every move and the heuristic value of its child.
+        """
+        # The from and over holes must have a piece and the to hole must be empty
+        moves = [ index for index, jump in enumerate(self.jumps) if (state & jump.need_mask) == jump.need_mask and not (state & jump.to_mask) ]
 
-                # Add the valid nodes to the result list
-                if (node1 is not None):
-                    result.append(node1)
-                if (node2 is not None):
-                    result.append(node2)
-                if (node3 is not None):
-                    result.append(node3)
-                if (node4 is not None):
-                    result.append(node4)
+        # Reject the children that can never reach the goal
+        if self.pruning is not None:
+            moves = self.pruning.FilterMoves(state, moves)
 
-            # Move to the next location
-            x += 1
-            if x >= self.GAME_SIZE:
-                y += 1
-                x = 0
+        if not moves:
+            return [], []
 
-        return result
+        # Score all the children at once
+        return moves, self.heuristic.EvaluateChildren(state, h_value, moves).tolist()
 
-    def rootNodeMD (self, matrix):
+    def IterChildren(self, state: int, h_value, path: list[int], stats: SearchStats) -> Iterator[tuple[int, int | float]]:
         """
-        Calculates the total Manhattan distance from all pieces to the center of the board.
+        Yields the children of a state from the lowest heuristic value, for the depth first searches
+        (DFS_Algorithm and IDAStar_Algorithm). The move of every child is on path while the child is
+        searched, and it is removed when the next child is requested, so a search that stops at the goal
+        keeps the whole solution on path.
 
         Parameters:
-            matrix (NDArray): The game board matrix.
+            state (int): The bitboard.
+            h_value (int | float): The heuristic value of the state.
+            path (list[int]): The index in the jump table of the moves made to reach the state.
+            stats (SearchStats): The statistics of the search (the children are counted as generated).
 
         Returns:
-            int: The total Manhattan distance.
+            Iterator[tuple[int, int | float]]: The bitboard of every child and its heuristic value.
+        """
+        moves, h_values = self.FindPossibleMoves(state, h_value)
+        stats.generated_nodes += len(moves)
+
+        # Move ordering: the most promising children first
+        jumps = self.jumps
+        for h_child, move in sorted(zip(h_values, moves)):
+            # Make the move (XOR is its own inverse, the state of the parent is unchanged) and unmake it on the path
+            path.append(move)
+            yield state ^ jumps[move].move_mask, h_child
+            path.pop()
+
+    def UpdateDepthFirstStats(self, stats: SearchStats, table, startTime: float):
         """
-        m = len(matrix)
-        n = len(matrix[1])
-        centre = (self.CENTER_X, self.CENTER_Y)
-        total = 0
+        Updates the statistics of a depth first search.
 
-        for row in range(m):
-            for column in range(n):
-                if (matrix[row][column] != -1):
-                    total += abs(row - centre[0]) + abs (column - centre[1])
+        Parameters:
+            stats (SearchStats): The statistics of the search.
+            table (set | dict): The positions stored by the search (its size is peak_closed_size).
+            startTime (float): The time.perf_counter() at the start of the search.
+        """
+        stats.peak_closed_size = max(stats.peak_closed_size, len(table))
+        stats.pruned_nodes = self.pruning.pruned if self.pruning is not None else 0
+        stats.elapsed_time = time.perf_counter() - startTime
 
-        print("The MD is: ", total)
-        return total
+    def ExpandBatch(self, states: NDArray, h_values: NDArray) -> tuple[NDArray, NDArray, NDArray, NDArray]:
+        """
+        Expands many states at once: the legal jumps of all of them are found with array operations
+        over the jump table, the children rejected by the pruning rules are dropped and the rest are
+        scored in a single heuristic call.
 
-    def A_Star(self, showResult=True):
+        Parameters:
+            states (NDArray): The bitboards (uint64).
+            h_values (NDArray): The heuristic value of every state.
+
+        Returns:
+            tuple[NDArray, NDArray, NDArray, NDArray]: The children, their heuristic values,
+                the index of their parent in states and the index of their jump in the jump table.
+        """
+        if len(self.cell_coords) > 64:
+            raise ValueError("The batched expansion supports boards of up to 64 holes")
+
+        parents, moves = self.GetLegalMovesBatch(states)
+        children = states[parents] ^ self.geometry.move_masks[moves]
+
+        # Reject the children that can never reach the goal
+        if self.pruning is not None and len(children) > 0:
+            alive = ~self.pruning.DeadMask(children)
+            self.pruning.pruned += len(children) - int(alive.sum())
+            children, parents, moves = children[alive], parents[alive], moves[alive]
+
+        return children, self.heuristic.EvaluateChildrenBatch(children, h_values[parents], moves), parents, moves
+
+    def A_Star(self, showResult=True, progress_callback = None, progress_interval: int = 10000, max_nodes: int = None, max_time: float = None, weight: float = 1) -> SearchStats:
         """
         Implements the A* algorithm to find the solution to the Peg Solitaire game.
+        After the search, exploredNodes holds the number of explored nodes and lastNode
+        the goal node (None if there is no solution). bestNode and bestPath hold the best
+        position reached (the goal, or the one with fewest pieces and lowest heuristic if
+        the search ended without a solution) and the moves to reach it.
+
+        Parameters:
+            showResult (bool): Print the solution and the statistics.
+            progress_callback (Callable[[SearchStats], None]): Called every progress_interval expansions
+                with the statistics so far (e.g. for live progress or profiling).
+            progress_interval (int): Number of expansions between calls to progress_callback.
+            max_nodes (int): Stop the search after this number of expansions (None for no limit).
+            max_time (float): Stop the search after this number of seconds (None for no limit).
+            weight (float): Weight of the heuristic, the open list is sorted by g + weight * h
+                (weighted A*, greedier when the weight is greater than 1).
+
+        Returns:
+            SearchStats: The statistics of the search (budget_exhausted is True if a limit stopped it).
         """
-        # Set the initial and goal states
-        initialState = self.GetGameMatrix()
-        goalState = self.GetObjetiveMatrix()
+        stats = SearchStats("A*")
+        startTime = time.perf_counter()
+
+        # Set the initial and goal states (packed bitboards, matrices are only built for printing)
+        initialState = self.GetGameBitboard()
+        goalState = self.GetObjetiveBitboard()
+
+        # Key used to identify a state in the open and close lists
+        stateKey = self.CanonicalBitboard if self.use_symmetry else int
 
         current: AStar_Node = None
-        initial_h = self.rootNodeMD(initialState)
+        initial_h = self.heuristic.Evaluate(initialState)
+        if (showResult):
+            self.PrintInitialHeuristic(initial_h)
+
+        # The pruning rules depend on the goal, they are built for every search
+        self.pruning = PositionPruning(self, goalState) if self.use_pruning else None
+        cache = PositionCache(self.cache_path, self, goalState, self.cache_size) if self.cache_path is not None else None
         initial_g = 0
 
         # Create open and close list variables
-        openList: list[ AStar_Node ] = []
+        # The open list is a heap of (f, h, insertion order, node): ties on f are broken by the
+        # lowest h and then by insertion order, so the search is deterministic
+        openList: list[ tuple[int, int, int, AStar_Node] ] = []
         closeList: set = set()
-        openList.append( AStar_Node(initialState, None, initial_g, initial_h) )
+        insertionOrder = itertools.count()
+
+        # Best g found so far for every state pushed to the open list
+        bestG: dict[int, int] = { stateKey(initialState): initial_g }
 
-        # APPROACH Priority Queue: Create the initial node and add it to the open list
-        # heapq.heappush(openList, (initial_h + initial_g, AStar_Node(initialState, None, initial_g, initial_h)))
+        # If the start can not reach the goal (e.g. a different position class) there is nothing to search
+        rootNode = AStar_Node(initialState, None, initial_g, initial_h)
+        cachedGoal = None
+        if cache is not None and cache.IsSolvable(initialState):
+            # Known position: follow the cached solvable positions down to the goal
+            cachedGoal = self.__completeFromCache(rootNode, cache, goalState)
+
+        if cachedGoal is not None:
+            current = cachedGoal
+            openList.clear()
+        elif self.pruning is None or self.pruning.IsSolvable(initialState):
+            heapq.heappush(openList, (initial_g + weight * initial_h, initial_h, next(insertionOrder), rootNode))
+
+        # Best position reached so far: most pieces removed, then lowest heuristic
+        bestNode = rootNode
 
         # Keep track of number of explored nodes
         exploredNodes = 0
+        nextProgress = progress_interval
 
-        while True:
+        while openList:
             # 1. Get the selected node based on the f_value
-            current = min(openList, key=lambda node: node.f_value)
-            # APPROACH Priority Queue: Get the selected node based on the f_value (Using a Priority Queue)
-            # _, current = heapq.heappop(openList)
+            timeFrontier = time.perf_counter()
+            _, _, _, current = heapq.heappop(openList)
+            timeHashing = time.perf_counter()
+            currentKey = stateKey(current.game_state)
+
+            # Lazy deletion: skip the entries that are already explored or that were improved after being pushed
+            if currentKey in closeList or current.g_value > bestG[currentKey]:
+                stats.stale_entries += 1
+                stats.frontier_time += timeHashing - timeFrontier
+                stats.hashing_time += time.perf_counter() - timeHashing
+                continue
 
             # 2. Check if in the selected node, the MapState is equal to the goal
-            if (np.array_equal(goalState, current.game_state)):
+            if (current.game_state == goalState):
                 break
 
-            # 3. Check if the game state already have been explored
-            state_tuple = tuple(map(tuple, current.game_state))
-            if state_tuple in closeList:
-                openList.remove(current)
-                continue
+            # Stop when the node or time budget is spent (the search is unfinished, nothing is proven)
+            if (max_nodes is not None and exploredNodes >= max_nodes) or (max_time is not None and timeHashing - startTime >= max_time):
+                stats.budget_exhausted = True
+                current = None
+                break
 
             # Keep track of explored nodes
             exploredNodes += 1
 
+            # 3. Add current to the close list
+            closeList.add(currentKey)
+            if current.g_value > bestNode.g_value or (current.g_value == bestNode.g_value and current.h_value < bestNode.h_value):
+                bestNode = current
+
             # 4. Explore next possible movement based on the current state
+            timeGeneration = time.perf_counter()
             nextNodes = self.__findPossibleNextMove( current )
-            for node in nextNodes:
-                node_tuple = tuple(map(tuple, node.game_state))
-                if node_tuple not in closeList:
-                    # heapq.heappush(openList, (node.f_value, node))
-                    openList.append(node)
 
-            # 5. Add current to the close list and remove it from the open
-            closeList.add(state_tuple)
-            openList.remove(current)
+            # Skip the children known to be dead and jump to the goal from a child known to be solvable
+            if cache is not None:
+                nextNodes, cachedGoal = self.__consultCache(cache, current, nextNodes, goalState)
+                if cachedGoal is not None:
+                    current = cachedGoal
+                    break
+            timeChildrenHashing = time.perf_counter()
+
+            # Only push the nodes whose state was not explored and that are the cheapest way found to reach it
+            # (with symmetry the node keeps its real state, so the path still shows the real moves)
+            newNodes = []
+            for node in nextNodes:
+                nodeKey = stateKey(node.game_state)
+                if nodeKey in closeList or node.g_value >= bestG.get(nodeKey, node.g_value + 1):
+                    continue
+
+                bestG[nodeKey] = node.g_value
+                newNodes.append(node)
+            timePush = time.perf_counter()
+
+            for node in newNodes:
+                heapq.heappush(openList, (node.g_value + weight * node.h_value, node.h_value, next(insertionOrder), node))
+            timeEnd = time.perf_counter()
+
+            # Update the statistics of the expansion
+            stats.frontier_time += (timeHashing - timeFrontier) + (timeEnd - timePush)
+            stats.hashing_time += (timeGeneration - timeHashing) + (timePush - timeChildrenHashing)
+            stats.move_generation_time += timeChildrenHashing - timeGeneration
+            stats.generated_nodes += len(nextNodes)
+            stats.duplicate_hits += len(nextNodes) - len(newNodes)
+            if len(openList) > stats.peak_open_size:
+                stats.peak_open_size = len(openList)
+
+            if progress_callback is not None and exploredNodes >= nextProgress:
+                nextProgress += progress_interval
+                self.__updateStats(stats, exploredNodes, closeList, startTime)
+                progress_callback(stats)
+        else:
+            # The open list was exhausted without reaching the goal (or it was never filled, see the cache above)
+            if cachedGoal is None:
+                if cache is not None:
+                    # Every explored position is proven dead
+                    for key in closeList:
+                        cache.AddDead(key)
+                current = None
 
         # Keep the last node
         lastNode = current
+        self.lastNode = lastNode
+        self.exploredNodes = exploredNodes
+
+        # Reconstruct the moves from the initial state to the goal state (or to the best position reached)
+        self.solution: list[ Jump ] = None
+        if (lastNode is not None):
+            self.solution = []
+            while current.parent_node != None:
+                self.solution.append( current.previous_move )
+                current = current.parent_node
+            self.solution.reverse()
+
+        self.bestNode = lastNode if lastNode is not None else bestNode
+        self.bestPath = self.solution
+        if (lastNode is None):
+            self.bestPath = []
+            node = bestNode
+            while node.parent_node is not None:
+                self.bestPath.append( node.previous_move )
+                node = node.parent_node
+            self.bestPath.reverse()
+
+        if cache is not None:
+            # Every position of the solution is proven solvable
+            if (lastNode is not None):
+                node = lastNode
+                while node is not None:
+                    cache.AddSolvable(node.game_state)
+                    node = node.parent_node
+            cache.Save()
+            stats.cache_hits = cache.hits
+
+        self.__updateStats(stats, exploredNodes, closeList, startTime)
+        stats.solved = lastNode is not None
+        stats.solution_length = lastNode.g_value if lastNode is not None else None
+        stats.best_pieces = self.bestNode.game_state.bit_count()
+
+        if (lastNode is None):
+            if (showResult):
+                self.PrintNoSolution(stats)
+            return stats
 
         if (showResult):
-          # Reconstruct the path from the initial state to the goal state
-          foundPath: list[ AStar_Node ] = []
-          while current != None:
-              foundPath.append( current )
-              current = current.parent_node
-          foundPath.reverse()
-
-          print("Recorrido:")
-          for node in foundPath:
-              self.PrintGame( node.game_state, node.previous_move )
-
-          # Print the number of moves made until reach that state
-          print("Total de movimientos realizados: ", lastNode.g_value)
-
-          # Print the total of explored nodes
-          print("Nodos explorados: ", exploredNodes)
+            self.PrintSolution(self.solution, stats)
+
+        return stats
+
+    def Anytime_Search(self, showResult=True, weights: tuple[float, ...] = (3, 2, 1.5, 1), max_time: float = None, max_nodes: int = None) -> SearchStats:
+        """
+        Runs weighted A* (see A_Star) from the greediest weight to the most careful one, sharing a time
+        and node budget: every run gets half of the budget that is left and the last one all of it, so the
+        greediest run, the one most likely to find a solution quickly, gets the largest slice and the
+        lower weights still run when it is stopped. Every solution removes the same number of pieces, so
+        the first solution found is final (a restart with a lower weight bounded by its cost can not find
+        a better one) and the search stops there. A run that ends without a solution and without spending
+        its slice proved that there is none. Until a solution is found, bestNode and bestPath keep the best
+        position reached by any run (fewest pieces, then lowest heuristic).
+
+        Parameters:
+            showResult (bool): Print the solution (or the best position reached) and the statistics.
+            weights (tuple[float, ...]): Weight of the heuristic of every run.
+            max_time (float): Total time budget in seconds (None for no limit).
+            max_nodes (int): Total number of expansions (None for no limit).
+
+        Returns:
+            SearchStats: The statistics of all the runs together.
+        """
+        stats = SearchStats("Anytime A*")
+        startTime = time.perf_counter()
+
+        if (showResult):
+            self.PrintInitialHeuristic(self.heuristic.Evaluate(self.GetGameBitboard()))
+
+        bestNode, bestPath = None, None
+        self.anytimeWeights = []
+        for index, weight in enumerate(weights):
+            remaining_time = None if max_time is None else max_time - (time.perf_counter() - startTime)
+            remaining_nodes = None if max_nodes is None else max_nodes - stats.expanded_nodes
+            if (remaining_time is not None and remaining_time <= 0) or (remaining_nodes is not None and remaining_nodes <= 0):
+                stats.budget_exhausted = True
+                break
+
+            # Half of what is left for every run but the last one
+            if index < len(weights) - 1:
+                remaining_time = None if remaining_time is None else remaining_time / 2
+                remaining_nodes = None if remaining_nodes is None else max(1, remaining_nodes // 2)
+
+            self.anytimeWeights.append(weight)
+            run = self.A_Star(False, max_nodes=remaining_nodes, max_time=remaining_time, weight=weight)
+            stats.expanded_nodes += run.expanded_nodes
+            stats.generated_nodes += run.generated_nodes
+            stats.duplicate_hits += run.duplicate_hits
+            stats.stale_entries += run.stale_entries
+            stats.pruned_nodes += run.pruned_nodes
+            stats.cache_hits += run.cache_hits
+            stats.move_generation_time += run.move_generation_time
+            stats.hashing_time += run.hashing_time
+            stats.frontier_time += run.frontier_time
+            stats.peak_open_size = max(stats.peak_open_size, run.peak_open_size)
+            stats.peak_closed_size = max(stats.peak_closed_size, run.peak_closed_size)
+            stats.budget_exhausted = run.budget_exhausted
+
+            if bestNode is None or (self.bestNode.g_value, -self.bestNode.h_value) > (bestNode.g_value, -bestNode.h_value):
+                bestNode, bestPath = self.bestNode, self.bestPath
+
+            if run.solved:
+                stats.solved = True
+                stats.solution_length = run.solution_length
+                break
+
+            if not run.budget_exhausted:
+                # The search was exhausted: there is no solution, a lower weight will not find one
+                break
+
+        self.bestNode, self.bestPath = bestNode, bestPath
+        self.solution = bestPath if stats.solved else None
+        self.exploredNodes = stats.expanded_nodes
+        stats.best_pieces = bestNode.game_state.bit_count() if bestNode is not None else None
+        stats.elapsed_time = time.perf_counter() - startTime
+
+        if (showResult):
+            if (stats.solved):
+                self.PrintSolution(self.solution, stats)
+            else:
+                self.PrintNoSolution(stats)
+
+        return stats
+
+    def Beam_Search(self, showResult=True, beam_width: int = 10000) -> SearchStats:
+        """
+        Searches layer by layer (every layer has one piece less), expanding a whole layer at once
+        with ExpandBatch and keeping only the beam_width children with the lowest heuristic.
+        Every move has the same cost, so the heuristic alone ranks the states of a layer.
+        With a limited beam the search may miss the solution; without it (None) the layers
+        hold every reachable state and the search is complete.
+
+        Parameters:
+            showResult (bool): Print the solution and the statistics.
+            beam_width (int): Maximum number of states of every layer (None for no limit).
+
+        Returns:
+            SearchStats: The statistics of the search (peak_open_size is the size of the biggest layer).
+        """
+        if len(self.cell_coords) > 64:
+            raise ValueError("The beam search supports boards of up to 64 holes")
+
+        stats = SearchStats("Beam")
+        startTime = time.perf_counter()
+
+        initialState = self.GetGameBitboard()
+        goalState = self.GetObjetiveBitboard()
+
+        initial_h = self.heuristic.Evaluate(initialState)
+        if (showResult):
+            self.PrintInitialHeuristic(initial_h)
+
+        self.pruning = PositionPruning(self, goalState) if self.use_pruning else None
+
+        # Every layer keeps its states, and the parent index and jump of every state to rebuild the path
+        states = np.array([ initialState ], dtype=np.uint64)
+        h_values = np.array([ initial_h ])
+        layers: list[ tuple[NDArray, NDArray] ] = []
+        if self.pruning is not None and not self.pruning.IsSolvable(initialState):
+            states = states[:0]
+
+        goalIndex = None
+        while len(states) > 0:
+            found = np.flatnonzero(states == np.uint64(goalState))
+            if len(found) > 0:
+                goalIndex = int(found[0])
+                break
+
+            stats.expanded_nodes += len(states)
+            children, child_h, parents, moves = self.ExpandBatch(states, h_values)
+            stats.generated_nodes += len(children)
+
+            # Keep the best copy of every state (by its key), then the best beam_width states
+            keys = self.CanonicalBitboards(children) if self.use_symmetry else children
+            order = np.argsort(child_h, kind="stable")
+            _, first = np.unique(keys[order], return_index=True)
+            selected = order[first]
+            stats.duplicate_hits += len(children) - len(selected)
+            selected = selected[np.argsort(child_h[selected], kind="stable")[:beam_width]]
+
+            layers.append((parents[selected], moves[selected]))
+            states, h_values = children[selected], child_h[selected]
+            stats.peak_open_size = max(stats.peak_open_size, len(states))
+
+        # Follow the parent indexes back to the initial state
+        path: list[ Jump ] = []
+        if goalIndex is not None:
+            index = goalIndex
+            for parents, moves in reversed(layers):
+                path.append(self.jumps[int(moves[index])])
+                index = int(parents[index])
+            path.reverse()
+
+        stats.pruned_nodes = self.pruning.pruned if self.pruning is not None else 0
+        stats.elapsed_time = time.perf_counter() - startTime
+        stats.solved = goalIndex is not None
+        stats.solution_length = len(path) if goalIndex is not None else None
+
+        self.exploredNodes = stats.expanded_nodes
+        self.solution = path if goalIndex is not None else None
+
+        if (showResult):
+            if (goalIndex is not None):
+                self.PrintSolution(self.solution, stats)
+            else:
+                self.PrintNoSolution(stats)
+
+        return stats
+
+    def PrintInitialHeuristic(self, h_value) -> None:
+        """
+        Prints the heuristic value of the initial state (not in the "jsonl" output_format).
+        """
+        if self.output_format != "jsonl":
+            print(f"The initial {self.heuristic.name} heuristic is: ", h_value)
+
+    def PrintNoSolution(self, stats: SearchStats) -> None:
+        """
+        Prints that the search ended without a solution, and the statistics of the search.
+        If a budget stopped it, the best position reached is printed too.
+        """
+        if self.output_format == "jsonl":
+            # A stopped search still gives the moves to the best position reached
+            bestPath = self.bestPath if stats.budget_exhausted and self.bestPath is not None else []
+            records = ( MoveRecord(number, jump) for number, (jump, _) in enumerate(self.IterSolution(bestPath), 1) )
+            WriteJSONLines(itertools.chain(records, [ { "stats": stats.AsDict() } ]), sys.stdout)
+            return
+
+        print("Presupuesto agotado, búsqueda detenida" if stats.budget_exhausted else "No se encontró solución")
+        if stats.budget_exhausted and self.bestPath is not None and self.output_format == "boards":
+            print(f"Mejor posición alcanzada ({stats.best_pieces} piezas):")
+            self.PrintGame( self.bestNode.game_state )
+        print("Nodos explorados: ", stats.expanded_nodes)
+        stats.PrintStats()
+
+    def IterSolution(self, foundPath: list[ Jump ] = None) -> Iterator[tuple[ Jump, int ]]:
+        """
+        Yields the moves of a solution one by one, replaying them from the initial state.
+
+        Parameters:
+            foundPath (list[Jump]): The moves of the solution, by default the last solution found.
+
+        Returns:
+            Iterator[tuple[Jump, int]]: Every move and the bitboard after it.
+        """
+        state = self.GetGameBitboard()
+        for jump in (foundPath if foundPath is not None else self.solution or []):
+            state ^= jump.move_mask
+            yield jump, state
+
+    def SolutionMoves(self, foundPath: list[ Jump ] = None) -> Iterator[str]:
+        """
+        Yields the moves of a solution in standard notation (e.g. "d2-d4").
+
+        Parameters:
+            foundPath (list[Jump]): The moves of the solution, by default the last solution found.
+        """
+        for jump, _ in self.IterSolution(foundPath):
+            yield MoveNotation(jump)
+
+    def PrintSolution(self, foundPath: list[ Jump ], stats: SearchStats) -> None:
+        """
+        Prints a solution and the statistics of the search, in the output_format:
+        "boards" prints every board, "moves" only the moves in standard notation and "jsonl"
+        one JSON object per move followed by one with the statistics.
+        Every move is written as soon as it is replayed, no board list is built.
+
+        Parameters:
+            foundPath (list[Jump]): The moves of the solution.
+            stats (SearchStats): The statistics of the search.
+        """
+        if self.output_format == "jsonl":
+            records = ( MoveRecord(number, jump) for number, (jump, _) in enumerate(self.IterSolution(foundPath), 1) )
+            WriteJSONLines(itertools.chain(records, [ { "stats": stats.AsDict() } ]), sys.stdout)
+            return
+
+        if self.output_format == "moves":
+            print("Recorrido:", " ".join(self.SolutionMoves(foundPath)))
+        else:
+            print("Recorrido:")
+            self.PrintGame( self.GetGameBitboard() )
+            for jump, state in self.IterSolution(foundPath):
+                self.PrintGame( state, [jump.from_coord, jump.to_coord] )
+
+        # Print the number of moves made until reach that state
+        print("Total de movimientos realizados: ", len(foundPath))
+
+        # Print the total of explored nodes
+        print("Nodos explorados: ", stats.expanded_nodes)
+        stats.PrintStats()
+
+    def __consultCache(self, cache: PositionCache, current_node: AStar_Node, nextNodes: list[ AStar_Node ], goalState: int) -> tuple[list[ AStar_Node ], AStar_Node]:
+        """
+        Looks up the children of an expansion in the position cache.
+
+        Returns:
+            tuple[list[AStar_Node], AStar_Node]: The children not known to be dead, and the goal node
+            if it was reached from a child known to be solvable (None otherwise).
+        """
+        if not nextNodes:
+            cache.AddDead(current_node.game_state)
+            return nextNodes, None
+
+        dead, solvable = cache.LookupBatch([ node.game_state for node in nextNodes ])
+        for node, isSolvable in zip(nextNodes, solvable):
+            if isSolvable:
+                goalNode = self.__completeFromCache(node, cache, goalState)
+                if goalNode is not None:
+                    return nextNodes, goalNode
+
+        aliveNodes = [ node for node, isDead in zip(nextNodes, dead) if not isDead ]
+        if not aliveNodes:
+            # All the children are dead, so the current position is dead too
+            cache.AddDead(current_node.game_state)
+
+        return aliveNodes, None
+
+    def __completeFromCache(self, node: AStar_Node, cache: PositionCache, goalState: int) -> AStar_Node:
+        """
+        Follows the children known to be solvable from a node known to be solvable, down to the goal.
+
+        Returns:
+            AStar_Node: The goal node, or None if the cache does not have a complete path (e.g. evicted entries).
+        """
+        while node.game_state != goalState:
+            moves, h_values = self.FindPossibleMoves(node.game_state, node.h_value)
+            children = [ node.game_state ^ self.jumps[index].move_mask for index in moves ]
+            if not children:
+                return None
+
+            _, solvable = cache.LookupBatch(children)
+            nextIndex = next((i for i, child in enumerate(children) if child == goalState or solvable[i]), None)
+            if nextIndex is None:
+                return None
+
+            node = self.__generateNode(self.jumps[moves[nextIndex]], node, h_values[nextIndex])
+
+        return node
+
+    def __updateStats(self, stats: SearchStats, exploredNodes: int, closeList: set, startTime: float):
+        stats.expanded_nodes = exploredNodes
+        stats.peak_closed_size = len(closeList)
+        stats.pruned_nodes = self.pruning.pruned if self.pruning is not None else 0
+        stats.elapsed_time = time.perf_counter() - startTime
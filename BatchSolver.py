@@ -0,0 +1,93 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+import numpy as np
+from AStar_Algorithm import AStar_Algorithm
+from Solvers import CreateSolver, RunSolver
+
+# Batch solver: many independent start/goal pairs over a process pool, results streamed as they finish
+
+def _toBitboard(game: AStar_Algorithm, board) -> int:
+    # A job board can be a bitboard or a game matrix
+    if board is None or isinstance(board, (int, np.integer)):
+        return None if board is None else int(board)
+
+    return game.MatrixToBitboard(np.asarray(board, dtype=object))
+
+def _goalCachePath(path: str, goal: int) -> str:
+    # A cache file only keeps the positions of one goal, the jobs of other goals would replace it
+    root, extension = os.path.splitext(path)
+    return f"{root}.{goal:x}{extension}"
+
+def _solveJob(index: int, job: dict, options: dict, max_nodes: int, max_time: float) -> dict:
+    solver = CreateSolver("astar", **options)
+    start = _toBitboard(solver, job.get("start"))
+    goal = _toBitboard(solver, job.get("goal"))
+
+    solver.SetGameBitboard(start)
+    if goal is not None:
+        solver.SetObjetiveBitboard(goal)
+    if solver.cache_path is not None:
+        solver.cache_path = _goalCachePath(solver.cache_path, solver.GetObjetiveBitboard())
+
+    # The budget of this job alone, counted from the moment its worker starts it
+    stats = RunSolver(solver, False, max_nodes=max_nodes, max_time=max_time)
+
+    return {
+        "job": index,
+        "start": solver.GetGameBitboard(),
+        "goal": solver.GetObjetiveBitboard(),
+        "solved": stats.solved,
+        "solution": [ (jump.from_coord, jump.to_coord) for jump in solver.solution ] if solver.solution is not None else None,
+        "stats": stats.AsDict(),
+        "worker": os.getpid(),
+    }
+
+def SingleVacancyJobs(board = "english") -> list[dict]:
+    """
+    Gets the classic single vacancy problems of a board: for every hole, start with only that hole
+    empty and finish with a single piece in that same hole.
+
+    Parameters:
+        board (str | list[str] | NDArray): The name of the board (see Boards.BOARDS) or a custom mask.
+
+    Returns:
+        list[dict]: One job (start and goal bitboards) for every hole of the board.
+    """
+    game = AStar_Algorithm(board)
+    return [ { "start": game.full_mask & ~(1 << bit), "goal": 1 << bit } for bit in range(len(game.cell_coords)) ]
+
+def SolveBatch(jobs: list[dict], options: dict = None, workers: int = None, max_nodes: int = None, max_time: float = None) -> Iterator[dict]:
+    """
+    Solves many start/goal pairs in parallel. The results are yielded as soon as every job finishes
+    (not in the order of the jobs, the "job" key is the index of the job).
+    The budgets are per job: every job gets the whole max_nodes and max_time from the moment its worker
+    starts it, so a slow job can not use up the budget of the others. The batch itself has no global bound,
+    it can take up to about len(jobs) / workers * max_time seconds.
+
+    Parameters:
+        jobs (list[dict]): Every job has a "start" and a "goal" (bitboard or game matrix), a missing
+            one is the default of the board.
+        options (dict): Arguments of AStar_Algorithm (board, heuristic, use_symmetry, use_pruning, cache_path, cache_size).
+            With cache_path every goal has its own cache file, named by the goal bitboard in hexadecimal
+            (e.g. "cache.10000.bin" for "cache.bin"), shared by all the jobs of that goal (their saves are
+            serialized by the lock of the cache) and bounded by cache_size.
+        workers (int): Number of worker processes, by default one per CPU.
+        max_nodes (int): Node budget of each job on its own (None for no limit).
+        max_time (float): Time budget in seconds of each job on its own, not of the batch (None for no limit).
+
+    Returns:
+        Iterator[dict]: For every job its index, start, goal, if it was solved, the solution as
+            ((x, y) from, (x, y) to) moves, the statistics of the search and the worker process.
+    """
+    options = options or {}
+    workers = workers or os.cpu_count() or 1
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [ pool.submit(_solveJob, index, job, options, max_nodes, max_time) for index, job in enumerate(jobs) ]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # If the caller stops reading, the jobs not started yet are cancelled
+        pool.shutdown(wait=True, cancel_futures=True)
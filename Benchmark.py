@@ -0,0 +1,198 @@
+import csv
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from SearchStats import SearchStats
+from Solvers import Solve
+
+# Benchmark runner: repeats a solve over a process pool and summarizes the timings
+
+def _solve(options: dict) -> SearchStats:
+    # The "engine" option selects the search (see Solvers.ENGINES), the other ones are the arguments of its class
+    options = dict(options)
+    return Solve(options.pop("engine", "astar"), False, options)
+
+def _warmUp(options: dict, warmup: int) -> None:
+    # Runs in every worker when it starts: imports, board compilation and first solves are not timed
+    for _ in range(warmup):
+        _solve(options)
+
+def _timedRun(options: dict) -> dict:
+    start_time = time.perf_counter()
+    stats = _solve(options)
+    end_time = time.perf_counter()
+
+    return {
+        "execution_time": end_time - start_time,
+        "explored_nodes": stats.expanded_nodes,
+        "generated_nodes": stats.generated_nodes,
+        "pruned_nodes": stats.pruned_nodes,
+        "peak_open_size": stats.peak_open_size,
+        "solved": stats.solved,
+        "worker": os.getpid(),
+    }
+
+def _memoryRun(options: dict) -> int:
+    # The search is deterministic, so the peak memory is measured once (tracemalloc slows the run down)
+    tracemalloc.start()
+    try:
+        _solve(options)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+def Percentile(values: list[float], percentile: float) -> float:
+    """
+    Gets a percentile of a list of values (linear interpolation between the closest ranks).
+
+    Parameters:
+        values (list[float]): The values.
+        percentile (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile of the values.
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percentile / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def Summarize(values: list[float]) -> dict:
+    """
+    Gets the statistics of a list of values.
+
+    Parameters:
+        values (list[float]): The values.
+
+    Returns:
+        dict: mean, median, p95, stddev, min and max of the values.
+    """
+    return {
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "p95": Percentile(values, 95),
+        "stddev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "min": min(values),
+        "max": max(values),
+    }
+
+def _gitCommit() -> str:
+    # The commit of the repository of this file, wherever the benchmark is run from
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def RunBenchmark(options: dict = None, repetitions: int = 30, warmup: int = 1, workers: int = None, measure_memory: bool = True) -> dict:
+    """
+    Runs a solve several times over a process pool.
+
+    Parameters:
+        options (dict): The search engine ("engine", see Solvers.ENGINES, A* by default) and the arguments
+            of its class (board, heuristic, use_symmetry, use_pruning).
+        repetitions (int): Number of timed runs.
+        warmup (int): Number of untimed runs made by every worker before the timed runs.
+        workers (int): Number of worker processes, by default one per CPU.
+        measure_memory (bool): Measure the peak memory of the search with tracemalloc (one extra run).
+
+    Returns:
+        dict: The options, the summary of the timings and every run.
+    """
+    options = options or {}
+    workers = workers or os.cpu_count() or 1
+
+    runs = []
+    peak_memory = None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warmUp, initargs=(options, warmup)) as pool:
+        memory_future = pool.submit(_memoryRun, options) if measure_memory else None
+
+        futures = [ pool.submit(_timedRun, options) for _ in range(repetitions) ]
+        for future in as_completed(futures):
+            runs.append(future.result())
+
+        if memory_future is not None:
+            peak_memory = memory_future.result()
+
+    times = [ run["execution_time"] for run in runs ]
+    nodes = [ run["explored_nodes"] for run in runs ]
+
+    return {
+        "commit": _gitCommit(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "options": options,
+        "repetitions": repetitions,
+        "warmup": warmup,
+        "workers": workers,
+        "execution_time": Summarize(times),
+        "explored_nodes": Summarize(nodes),
+        "nodes_per_second": statistics.fmean(nodes) / statistics.fmean(times) if statistics.fmean(times) > 0 else None,
+        "peak_memory_bytes": peak_memory,
+        "solved": all(run["solved"] for run in runs),
+        "runs": runs,
+    }
+
+def WriteJSON(result: dict, path: str) -> None:
+    """
+    Writes the result of a benchmark as JSON.
+    """
+    with open(path, "w") as file:
+        json.dump(result, file, indent=2)
+
+def WriteCSV(result: dict, path: str) -> None:
+    """
+    Writes every run of a benchmark as a CSV row.
+    """
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["run", "execution_time", "explored_nodes", "generated_nodes", "pruned_nodes", "peak_open_size", "solved", "worker"])
+        writer.writeheader()
+        for index, run in enumerate(result["runs"]):
+            writer.writerow({ "run": index, **run })
+
+def PlotResults(result: dict, path: str = None) -> None:
+    """
+    Plots the execution time of every run. matplotlib is only imported here.
+
+    Parameters:
+        result (dict): The result of RunBenchmark.
+        path (str): File to save the plot, if None the plot is shown.
+    """
+    import matplotlib.pyplot as plt
+
+    times = [ run["execution_time"] for run in result["runs"] ]
+
+    plt.figure(figsize=(10, 5))
+    plt.plot(range(len(times)), times, marker='o', linestyle='-', color='b')
+    plt.axhline(result["execution_time"]["median"], color='r', linestyle='--', label='Mediana')
+    plt.title('Tiempo de Ejecución del Algoritmo A*')
+    plt.xlabel('Número de ejecuciones')
+    plt.ylabel('Tiempo de Ejecución (segundos)')
+    plt.legend()
+    plt.grid(True)
+
+    if path is None:
+        plt.show()
+    else:
+        plt.savefig(path)
+
+def PrintSummary(result: dict) -> None:
+    """
+    Prints the summary of a benchmark.
+    """
+    times = result["execution_time"]
+    print(f"Ejecuciones: {result['repetitions']} ({result['workers']} procesos, {result['warmup']} de calentamiento)")
+    print(f"Tiempo (s): media {times['mean']:.6f}, mediana {times['median']:.6f}, p95 {times['p95']:.6f}, desviación {times['stddev']:.6f}")
+    print(f"Nodos explorados: {result['explored_nodes']['median']:.0f}")
+    if result["peak_memory_bytes"] is not None:
+        print(f"Memoria máxima: {result['peak_memory_bytes'] / 1024 / 1024:.2f} MB")
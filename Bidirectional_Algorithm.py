@@ -0,0 +1,252 @@
+import heapq
+import itertools
+import time
+import numpy as np
+from numpy.typing import NDArray
+from AStar_Algorithm import AStar_Algorithm, AStar_Node
+from Boards import Jump
+from Pruning import PositionPruning
+from SearchStats import SearchStats
+
+class Bidirectional_Algorithm(AStar_Algorithm):
+    """
+    Class implementing a bidirectional search for the Peg Solitaire game.
+    Every jump can be undone with a reverse jump (the from and over holes are filled and the to hole is
+    emptied), so the positions that can reach the goal are found by reverse jumps from the goal, layer by
+    layer (one piece more in every layer). The forward search from the initial state (best first, as A_Star)
+    then stops at the first position it generates in any backward layer: every layer holds all the positions
+    of its number of pieces that can reach the goal, the other ones are dead.
+    Both sides use the jump table of the board and the canonical keys of PegSolitaire.
+
+    A reverse jump on a position is a normal jump on its complement, so the backward positions are
+    pruned with the rules of Pruning.PositionPruning applied to the complements, with the complement
+    of the initial state as goal.
+
+    Attributes:
+        max_backward_states (int): The backward search stops adding layers when a layer reaches this size.
+        backwardLayers (list[set[int]]): Canonical keys of the positions of every backward layer of the last search
+            (layer i has i pieces more than the goal).
+
+    Methods:
+        Bidirectional_Search():
+            Implements the bidirectional search to find the solution to the Peg Solitaire game.
+    """
+
+    def __init__(self, board = "english", heuristic = "manhattan", use_symmetry: bool = True, use_pruning: bool = True, max_backward_states: int = 50000):
+        """
+        Initializes the bidirectional search.
+
+        Parameters:
+            board (str | list[str] | NDArray): The name of the board (see Boards.BOARDS) or a custom mask.
+            heuristic (str | Heuristic): The name of the heuristic (see Heuristics.HEURISTICS) or a heuristic object,
+                used by the forward search.
+            use_symmetry (bool): Store the symmetric copies of a position as one (shared index of both sides),
+                under the symmetries that keep both the goal and the initial state.
+            use_pruning (bool): Reject the positions that can never reach the goal (forward) or the start (backward).
+            max_backward_states (int): Maximum size of a backward layer.
+        """
+        super().__init__(board, heuristic, use_symmetry, use_pruning)
+        self.max_backward_states = max_backward_states
+        self.backwardLayers: list[set[int]] = []
+
+    def __findReverseMoves(self, state: int) -> list[int]:
+        # The to hole must have a piece and the from and over holes must be empty
+        return [ index for index, jump in enumerate(self.jumps) if (state & jump.to_mask) and not (state & jump.need_mask) ]
+
+    def __reverseLayer(self, frontier: list[int], complementPruning: PositionPruning, stateKey, stats: SearchStats) -> tuple[set[int], list[int]]:
+        # The parents of a layer by reverse jumps, one position at a time (any board)
+        nextLayer: set[int] = set()
+        nextFrontier: list[int] = []
+        for state in frontier:
+            stats.expanded_nodes += 1
+            for move in self.__findReverseMoves(state):
+                parent = state ^ self.jumps[move].move_mask
+                stats.generated_nodes += 1
+
+                # The parent must still be reachable from the initial state
+                if complementPruning is not None and complementPruning.IsDead(self.full_mask ^ parent):
+                    stats.pruned_nodes += 1
+                    continue
+
+                key = stateKey(parent)
+                if key in nextLayer:
+                    stats.duplicate_hits += 1
+                    continue
+
+                nextLayer.add(key)
+                nextFrontier.append(parent)
+
+        return nextLayer, nextFrontier
+
+    def __reverseLayerBatch(self, frontier, complementPruning: PositionPruning, permutations: list, stats: SearchStats) -> tuple[set[int], NDArray]:
+        # The parents of a layer by reverse jumps, the whole layer at once (boards of up to 64 holes):
+        # a reverse jump on a position is a normal jump on its complement
+        full_mask = np.uint64(self.full_mask)
+        complements = np.asarray(frontier, dtype=np.uint64) ^ full_mask
+        states, moves = self.GetLegalMovesBatch(complements)
+        parents = complements[states] ^ self.geometry.move_masks[moves]
+        stats.expanded_nodes += len(complements)
+        stats.generated_nodes += len(parents)
+
+        # The parent must still be reachable from the initial state
+        if complementPruning is not None and len(parents) > 0:
+            alive = ~complementPruning.DeadMask(parents)
+            stats.pruned_nodes += len(parents) - int(np.count_nonzero(alive))
+            parents = parents[alive]
+
+        parents ^= full_mask
+        keys, first = np.unique(self.geometry.CanonicalBatch(parents, permutations), return_index=True)
+        stats.duplicate_hits += len(parents) - len(keys)
+        return set(keys.tolist()), parents[first]
+
+    def __searchBackward(self, initialState: int, goalState: int, stateKey, permutations: list, stats: SearchStats) -> list[set[int]]:
+        # Layers of the positions that can reach the goal, up to the size limit or to the pieces of the initial state
+        complementPruning = PositionPruning(self, self.full_mask ^ initialState) if self.use_pruning else None
+        depth = initialState.bit_count() - goalState.bit_count()
+        batched = len(self.cell_coords) <= 64
+
+        layers = [ { stateKey(goalState) } ]
+        frontier = [ goalState ]
+        while len(layers) <= depth and len(layers[-1]) < self.max_backward_states:
+            if batched:
+                nextLayer, frontier = self.__reverseLayerBatch(frontier, complementPruning, permutations, stats)
+            else:
+                nextLayer, frontier = self.__reverseLayer(frontier, complementPruning, stateKey, stats)
+
+            layers.append(nextLayer)
+            if not nextLayer:
+                break
+
+        return layers
+
+    def Bidirectional_Search(self, showResult=True, max_nodes: int = None, max_time: float = None) -> SearchStats:
+        """
+        Implements the bidirectional search to find the solution to the Peg Solitaire game.
+        The output is the same as the one of A_Star.
+
+        Parameters:
+            showResult (bool): Print the solution and the statistics.
+            max_nodes (int): Stop the forward search after this number of expansions (None for no limit).
+            max_time (float): Stop the forward search after this number of seconds (None for no limit).
+
+        Returns:
+            SearchStats: The statistics of both sides of the search (peak_closed_size is the size of the backward index,
+                budget_exhausted is True if a limit stopped it).
+        """
+        stats = SearchStats("Bidirectional")
+        startTime = time.perf_counter()
+
+        initialState = self.GetGameBitboard()
+        goalState = self.GetObjetiveBitboard()
+        jumps = self.jumps
+
+        # Only the symmetries that also keep the initial state: the backward positions are pruned by their
+        # distance to the initial state, so a symmetric copy of a pruned position could still be reachable
+        initialSymmetries = self.geometry.GoalSymmetries(initialState)
+        permutations = [ permutation for permutation in self.symmetries[1:] if permutation in initialSymmetries ] if self.use_symmetry else []
+        symmetryTables = [ self.geometry.GetSymmetryTables(permutation) for permutation in permutations ]
+        def stateKey(state: int) -> int:
+            return self.geometry.Canonical(state, symmetryTables)
+
+        initial_h = self.heuristic.Evaluate(initialState)
+        if (showResult):
+            self.PrintInitialHeuristic(initial_h)
+
+        self.pruning = PositionPruning(self, goalState) if self.use_pruning else None
+
+        # 1. Backward layers from the goal
+        layers = self.__searchBackward(initialState, goalState, stateKey, permutations, stats)
+        self.backwardLayers = layers
+        goalPieces = goalState.bit_count()
+
+        def layerOf(state: int, key: int) -> int:
+            # Index of the backward layer of a position: -1 if it has more pieces than the last layer, None if
+            # it is not in its layer (every layer holds all the positions of its pieces that can reach the goal,
+            # so such a position is dead)
+            index = state.bit_count() - goalPieces
+            if index >= len(layers):
+                return -1
+            return index if index >= 0 and key in layers[index] else None
+
+        # 2. Forward best first search (as A_Star), stopping at the first position generated in any backward layer.
+        # Every path to a position has the same length (one move per piece removed), so a position is only pushed once
+        openList: list[ tuple[int, int, int, AStar_Node] ] = []
+        seen: set = set()
+        insertionOrder = itertools.count()
+        meetNode: AStar_Node = None
+        meetIndex = None
+        rootNode = AStar_Node(initialState, None, 0, initial_h)
+        rootKey = stateKey(initialState)
+        rootLayer = layerOf(initialState, rootKey) if layers[-1] else None
+        if rootLayer is not None and rootLayer >= 0:
+            meetNode, meetIndex = rootNode, rootLayer
+        elif rootLayer is not None and (self.pruning is None or self.pruning.IsSolvable(initialState)):
+            seen.add(rootKey)
+            heapq.heappush(openList, (initial_h, initial_h, next(insertionOrder), rootNode))
+
+        forwardNodes = 0
+        while openList and meetNode is None:
+            # Stop when the node or time budget is spent (the search is unfinished, nothing is proven)
+            if (max_nodes is not None and forwardNodes >= max_nodes) or (max_time is not None and time.perf_counter() - startTime >= max_time):
+                stats.budget_exhausted = True
+                break
+
+            _, _, _, current = heapq.heappop(openList)
+            forwardNodes += 1
+            stats.expanded_nodes += 1
+            moves, h_values = self.FindPossibleMoves(current.game_state, current.h_value)
+            stats.generated_nodes += len(moves)
+            for move, h_value in zip(moves, h_values):
+                child = current.game_state ^ jumps[move].move_mask
+                childKey = stateKey(child)
+                if childKey in seen:
+                    stats.duplicate_hits += 1
+                    continue
+
+                # The positions with as few pieces as a backward layer are either known to reach the goal or dead
+                childLayer = layerOf(child, childKey)
+                if childLayer is None:
+                    continue
+
+                node = AStar_Node(child, current, current.g_value + 1, h_value, jumps[move])
+                if childLayer >= 0:
+                    meetNode, meetIndex = node, childLayer
+                    break
+                seen.add(childKey)
+                heapq.heappush(openList, (node.f_value, node.h_value, next(insertionOrder), node))
+
+            if len(openList) > stats.peak_open_size:
+                stats.peak_open_size = len(openList)
+
+        # 3. Finish the path inside the backward layers: from every layer there is a move to the next one
+        path: list[Jump] = []
+        solved = meetNode is not None
+        if solved:
+            node = meetNode
+            while node.parent_node is not None:
+                path.append(node.previous_move)
+                node = node.parent_node
+            path.reverse()
+
+            state = meetNode.game_state
+            for layer in reversed(layers[:meetIndex]):
+                jump = next(jump for jump in jumps if (state & jump.need_mask) == jump.need_mask and not (state & jump.to_mask) and stateKey(state ^ jump.move_mask) in layer)
+                path.append(jump)
+                state ^= jump.move_mask
+
+        stats.pruned_nodes += self.pruning.pruned if self.pruning is not None else 0
+        stats.peak_closed_size = sum(len(layer) for layer in layers) + len(seen)
+        stats.elapsed_time = time.perf_counter() - startTime
+        stats.solved = solved
+        stats.solution_length = len(path) if solved else None
+
+        self.exploredNodes = stats.expanded_nodes
+        self.solution = path if solved else None
+
+        if (showResult):
+            if (solved):
+                self.PrintSolution(self.solution, stats)
+            else:
+                self.PrintNoSolution(stats)
+
+        return stats
@@ -0,0 +1,346 @@
+import functools
+import numpy as np
+from numpy.typing import NDArray
+
+# Board layouts: "o" is a playable hole, "." is outside of the board
+BOARDS = {
+    # Classic (English) board, 33 holes
+    "english": (
+        "..ooo..",
+        "..ooo..",
+        "ooooooo",
+        "ooooooo",
+        "ooooooo",
+        "..ooo..",
+        "..ooo..",
+    ),
+    # European (French) board, 37 holes
+    "european": (
+        "..ooo..",
+        ".ooooo.",
+        "ooooooo",
+        "ooooooo",
+        "ooooooo",
+        ".ooooo.",
+        "..ooo..",
+    ),
+    # German board, 45 holes
+    "german": (
+        "...ooo...",
+        "...ooo...",
+        "...ooo...",
+        "ooooooooo",
+        "ooooooooo",
+        "ooooooooo",
+        "...ooo...",
+        "...ooo...",
+        "...ooo...",
+    ),
+    # Square board, 36 holes
+    "square": (
+        "oooooo",
+        "oooooo",
+        "oooooo",
+        "oooooo",
+        "oooooo",
+        "oooooo",
+    ),
+}
+
+# Center (x, y) of the boards whose center is not the middle cell of the layout
+BOARD_CENTERS = {
+    "square": (3, 2),
+}
+
+class Jump:
+    """
+    Class representing a legal jump of the board (independent of the pieces on it).
+
+    Attributes:
+        from_bit (int): Bit of the hole where the piece starts.
+        over_bit (int): Bit of the hole of the jumped piece.
+        to_bit (int): Bit of the hole where the piece ends.
+        from_coord (tuple[int, int]): (x, y) coordinates of the starting hole.
+        over_coord (tuple[int, int]): (x, y) coordinates of the jumped hole.
+        to_coord (tuple[int, int]): (x, y) coordinates of the destination hole.
+        need_mask (int): Bits that must have a piece for the jump to be legal.
+        to_mask (int): Bit that must be empty for the jump to be legal.
+        move_mask (int): Bits that change when the jump is made (state ^ move_mask).
+    """
+    __slots__ = ("from_bit", "over_bit", "to_bit", "from_coord", "over_coord", "to_coord", "need_mask", "to_mask", "move_mask")
+
+    def __init__(self, from_bit: int, over_bit: int, to_bit: int, from_coord: tuple[int, int], over_coord: tuple[int, int], to_coord: tuple[int, int]) -> None:
+        self.from_bit = from_bit
+        self.over_bit = over_bit
+        self.to_bit = to_bit
+
+        self.from_coord = from_coord
+        self.over_coord = over_coord
+        self.to_coord = to_coord
+
+        self.need_mask = (1 << from_bit) | (1 << over_bit)
+        self.to_mask = 1 << to_bit
+        self.move_mask = self.need_mask | self.to_mask
+
+class BoardGeometry:
+    """
+    Class representing a compiled board: its holes, their bits and the table of legal jumps.
+
+    Attributes:
+        name (str): The name of the board ("custom" for custom masks).
+        layout (tuple[str]): The board layout ("o" hole, "." outside), always square.
+        GAME_SIZE (int): The size of the board.
+        CENTER_X (int): The x-coordinate of the center of the board.
+        CENTER_Y (int): The y-coordinate of the center of the board.
+        cell_coords (list[tuple[int, int]]): (y, x) coordinates of the hole of every bit.
+        cell_index (list[list[int]]): Bit of every (y, x) cell, -1 outside of the board.
+        full_mask (int): Bitboard with all the holes filled.
+        jumps (list[Jump]): All the legal (from, over, to) jumps of the board.
+        symmetries (list[tuple[int]]): Permutation of the bits of every rotation/reflection that maps
+            the board onto itself (the identity is always the first one).
+        need_masks, to_masks, move_masks (NDArray): The masks of the jump table as uint64 arrays,
+            for the batched move generation (None for boards of more than 64 holes).
+    """
+    def __init__(self, name: str, layout: tuple[str], center_x: int, center_y: int) -> None:
+        self.name = name
+        self.layout = layout
+        self.GAME_SIZE = len(layout)
+        self.CENTER_X = center_x
+        self.CENTER_Y = center_y
+
+        # Every playable hole gets one bit, numbered in row-major order
+        self.cell_index: list[list[int]] = [[-1] * self.GAME_SIZE for _ in range(self.GAME_SIZE)]
+        self.cell_coords: list[tuple[int, int]] = []
+        for y, row in enumerate(layout):
+            for x, cell in enumerate(row):
+                if cell == "o":
+                    self.cell_index[y][x] = len(self.cell_coords)
+                    self.cell_coords.append((y, x))
+
+        self.full_mask = (1 << len(self.cell_coords)) - 1
+
+        if self.__getBit(center_x, center_y) < 0:
+            raise ValueError(f"The center ({center_x}, {center_y}) is not a hole of the board")
+
+        # Compile the jumps once: only the (from, over, to) triples inside the board are kept
+        # Directions in the order up, down, right, left
+        self.jumps: list[Jump] = []
+        for from_bit, (y, x) in enumerate(self.cell_coords):
+            for dx, dy in ((0, -1), (0, 1), (1, 0), (-1, 0)):
+                over_bit = self.__getBit(x + dx, y + dy)
+                to_bit = self.__getBit(x + 2 * dx, y + 2 * dy)
+                if over_bit >= 0 and to_bit >= 0:
+                    self.jumps.append(Jump(from_bit, over_bit, to_bit, (x, y), (x + dx, y + dy), (x + 2 * dx, y + 2 * dy)))
+
+        self.need_masks = self.to_masks = self.move_masks = None
+        if len(self.cell_coords) <= 64:
+            self.need_masks = np.array([ jump.need_mask for jump in self.jumps ], dtype=np.uint64)
+            self.to_masks = np.array([ jump.to_mask for jump in self.jumps ], dtype=np.uint64)
+            self.move_masks = np.array([ jump.move_mask for jump in self.jumps ], dtype=np.uint64)
+
+        self.__initializeSymmetries()
+
+    # Find the rotations/reflections that map the board onto itself
+    def __initializeSymmetries(self):
+        n = self.GAME_SIZE - 1
+        transformations = [
+            lambda y, x: (y, x),          # Identity
+            lambda y, x: (x, n - y),      # Rotation 90
+            lambda y, x: (n - y, n - x),  # Rotation 180
+            lambda y, x: (n - x, y),      # Rotation 270
+            lambda y, x: (y, n - x),      # Horizontal mirror
+            lambda y, x: (n - y, x),      # Vertical mirror
+            lambda y, x: (x, y),          # Main diagonal mirror
+            lambda y, x: (n - x, n - y),  # Anti diagonal mirror
+        ]
+
+        self.symmetries: list[tuple[int]] = []
+        for transform in transformations:
+            permutation = tuple( self.cell_index[new_y][new_x] for new_y, new_x in (transform(y, x) for (y, x) in self.cell_coords) )
+            if -1 not in permutation and permutation not in self.symmetries:
+                self.symmetries.append(permutation)
+
+        # Lookup tables of every symmetry, built on demand
+        self.__symmetryTables: dict[tuple[int], list[list[int]]] = {}
+        self.__symmetryArrays: dict[tuple[int], NDArray] = {}
+
+    def __getBit(self, x: int, y: int) -> int:
+        if 0 <= x < self.GAME_SIZE and 0 <= y < self.GAME_SIZE:
+            return self.cell_index[y][x]
+        return -1
+
+    def PermuteBits(self, state: int, permutation: tuple[int]) -> int:
+        """
+        Applies a permutation of the bits to a bitboard.
+
+        Parameters:
+            state (int): The bitboard.
+            permutation (tuple[int]): The new position of every bit.
+
+        Returns:
+            int: The bitboard with every bit i moved to the position permutation[i].
+        """
+        result = 0
+        for bit, new_bit in enumerate(permutation):
+            if (state >> bit) & 1:
+                result |= 1 << new_bit
+
+        return result
+
+    def GetSymmetryTables(self, permutation: tuple[int]) -> list[list[int]]:
+        """
+        Gets the lookup tables to apply a permutation of the bits one byte at a time.
+
+        Parameters:
+            permutation (tuple[int]): The new position of every bit.
+
+        Returns:
+            list[list[int]]: For every byte of the bitboard, the permuted bits of its 256 values.
+        """
+        tables = self.__symmetryTables.get(permutation)
+        if tables is None:
+            tables = []
+            for chunk_start in range(0, len(self.cell_coords), 8):
+                tables.append([ self.PermuteBits(byte << chunk_start, permutation) for byte in range(256) ])
+            self.__symmetryTables[permutation] = tables
+
+        return tables
+
+    def PermuteBitsBatch(self, states: NDArray, permutation: tuple[int]) -> NDArray:
+        """
+        Applies a permutation of the bits to many bitboards at once (boards of up to 64 holes).
+
+        Parameters:
+            states (NDArray): The bitboards (uint64).
+            permutation (tuple[int]): The new position of every bit.
+
+        Returns:
+            NDArray: The permuted bitboards (uint64).
+        """
+        tables = self.__symmetryArrays.get(permutation)
+        if tables is None:
+            tables = np.array(self.GetSymmetryTables(permutation), dtype=np.uint64)
+            self.__symmetryArrays[permutation] = tables
+
+        result = np.zeros(len(states), dtype=np.uint64)
+        for chunk, table in enumerate(tables):
+            result |= table[(states >> np.uint64(8 * chunk)) & np.uint64(0xFF)]
+
+        return result
+
+    def GoalSymmetries(self, goal: int) -> list[tuple[int]]:
+        """
+        Gets the symmetries of the board that keep a position unchanged (usually the goal).
+
+        Parameters:
+            goal (int): The bitboard.
+
+        Returns:
+            list[tuple[int]]: The permutation of the bits of every symmetry that keeps it (the identity first).
+        """
+        return [ permutation for permutation in self.symmetries if self.PermuteBits(goal, permutation) == goal ]
+
+    def Canonical(self, state: int, symmetry_tables: list[list[list[int]]]) -> int:
+        """
+        Gets the canonical form of a bitboard: the smallest one among its symmetric copies.
+
+        Parameters:
+            state (int): The bitboard.
+            symmetry_tables (list): The tables (see GetSymmetryTables) of every symmetry but the identity.
+
+        Returns:
+            int: The smallest bitboard among the state and its copies.
+        """
+        canonical = state
+        for tables in symmetry_tables:
+            transformed = 0
+            shifted = state
+            for table in tables:
+                transformed |= table[shifted & 0xFF]
+                shifted >>= 8
+
+            if transformed < canonical:
+                canonical = transformed
+
+        return canonical
+
+    def CanonicalBatch(self, states: NDArray, permutations: list[tuple[int]]) -> NDArray:
+        """
+        Vectorized Canonical for many bitboards at once (boards of up to 64 holes).
+
+        Parameters:
+            states (NDArray): The bitboards (uint64).
+            permutations (list[tuple[int]]): The permutation of every symmetry but the identity.
+
+        Returns:
+            NDArray: The canonical form of every bitboard (uint64).
+        """
+        states = np.asarray(states, dtype=np.uint64)
+        canonical = states.copy()
+        for permutation in permutations:
+            np.minimum(canonical, self.PermuteBitsBatch(states, permutation), out=canonical)
+
+        return canonical
+
+    def GetMask(self) -> NDArray:
+        """
+        Gets the board mask.
+
+        Returns:
+            NDArray: Boolean matrix, True in the playable holes.
+        """
+        return np.array([[cell == "o" for cell in row] for row in self.layout], dtype=bool)
+
+@functools.lru_cache(maxsize=None)
+def _compileBoard(name: str, layout: tuple[str], center: tuple[int, int]) -> BoardGeometry:
+    return BoardGeometry(name, layout, center[0], center[1])
+
+def _normalizeLayout(board) -> tuple[tuple[str], tuple[int, int]]:
+    # Custom masks can be a list of strings ("o" hole, anything else outside) or a 2D array of booleans/0-1
+    if isinstance(board, np.ndarray):
+        rows = ["".join("o" if cell else "." for cell in row) for row in board.tolist()]
+    else:
+        rows = ["".join("o" if cell in ("o", 1, True) else "." for cell in row) for row in board]
+
+    if not rows or not any("o" in row for row in rows):
+        raise ValueError("The board mask has no playable holes")
+
+    # The default center is the middle of the mask (before padding it)
+    width = max(len(row) for row in rows)
+    center = (width // 2, len(rows) // 2)
+
+    # Rectangular masks are padded with non playable cells to be square
+    size = max(len(rows), width)
+    rows = [row.ljust(size, ".") for row in rows]
+    rows += ["." * size] * (size - len(rows))
+
+    return tuple(rows), center
+
+def GetBoardGeometry(board = "english", center: tuple[int, int] = None) -> BoardGeometry:
+    """
+    Gets the compiled geometry of a board. Every board is compiled only once per process.
+
+    Parameters:
+        board (str | list[str] | NDArray): The name of a board in BOARDS or a custom mask.
+        center (tuple[int, int]): (x, y) coordinates of the center, by default the middle of the board.
+
+    Returns:
+        BoardGeometry: The compiled board.
+    """
+    if isinstance(board, str):
+        if board not in BOARDS:
+            raise ValueError(f"Unknown board '{board}', expected one of: {', '.join(BOARDS)}")
+        name = board
+        layout = BOARDS[board]
+        if center is None:
+            center = BOARD_CENTERS.get(board)
+    else:
+        name = "custom"
+        layout, default_center = _normalizeLayout(board)
+        if center is None:
+            center = default_center
+
+    if center is None:
+        center = (len(layout) // 2, len(layout) // 2)
+
+    return _compileBoard(name, layout, tuple(center))
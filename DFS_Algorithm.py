@@ -0,0 +1,132 @@
+import time
+from AStar_Algorithm import AStar_Algorithm, AStar_Node
+from Pruning import PositionPruning
+from SearchStats import SearchStats
+
+class DFS_Algorithm(AStar_Algorithm):
+    """
+    Class implementing a depth first search for the Peg Solitaire game.
+    Every solution has the same number of moves (one piece less per move), so the best first order of
+    A* is replaced by a plain depth first search that only keeps the moves of the current path (see
+    AStar_Algorithm.IterChildren). The children are tried from the lowest heuristic value, and the
+    positions proven to fail are kept in a bounded set so they are never searched twice.
+
+    Attributes:
+        failed_size (int): Maximum number of positions of the failed set (0 to disable it).
+
+    Methods:
+        DFS_Search():
+            Implements the depth first search to find the solution to the Peg Solitaire game.
+    """
+
+    def __init__(self, board = "english", heuristic = "combined", use_symmetry: bool = False, use_pruning: bool = True, failed_size: int = 5000000):
+        """
+        Initializes the depth first search.
+
+        Parameters:
+            board (str | list[str] | NDArray): The name of the board (see Boards.BOARDS) or a custom mask.
+            heuristic (str | Heuristic): The name of the heuristic (see Heuristics.HEURISTICS) or a heuristic object,
+                used to order the moves (the combined heuristic finds the English solution after a few thousand nodes).
+            use_symmetry (bool): Share the failed set entries between the symmetric copies of a position.
+            use_pruning (bool): Reject the children that can never reach the goal.
+            failed_size (int): Maximum number of positions of the failed set (0 to disable it).
+        """
+        super().__init__(board, heuristic, use_symmetry, use_pruning)
+        self.failed_size = failed_size
+
+    def DFS_Search(self, showResult=True, max_nodes: int = None, max_time: float = None, progress_callback = None, progress_interval: int = 10000) -> SearchStats:
+        """
+        Implements the depth first search to find the solution to the Peg Solitaire game.
+        The output is the same as the one of A_Star.
+
+        Parameters:
+            showResult (bool): Print the solution and the statistics.
+            max_nodes (int): Stop the search after this number of expansions (None for no limit).
+            max_time (float): Stop the search after this number of seconds (None for no limit).
+            progress_callback (Callable[[SearchStats], None]): Called every progress_interval expansions.
+            progress_interval (int): Number of expansions between calls to progress_callback.
+
+        Returns:
+            SearchStats: The statistics of the search (peak_closed_size is the size of the failed set).
+        """
+        stats = SearchStats("DFS")
+        startTime = time.perf_counter()
+
+        initialState = self.GetGameBitboard()
+        goalState = self.GetObjetiveBitboard()
+        stateKey = self.CanonicalBitboard if self.use_symmetry else int
+        jumps = self.jumps
+
+        initial_h = self.heuristic.Evaluate(initialState)
+        if (showResult):
+            self.PrintInitialHeuristic(initial_h)
+
+        self.pruning = PositionPruning(self, goalState) if self.use_pruning else None
+
+        # Positions from which the goal can not be reached
+        failed: set[int] = set()
+
+        # The search keeps only the moves made to reach the current position
+        path: list[int] = []
+        bestPath: list[int] = []
+        bestState, best_h = initialState, initial_h
+        nextProgress = progress_interval
+
+        def search(state: int, h_value) -> bool:
+            nonlocal nextProgress, bestPath, bestState, best_h
+
+            if state == goalState:
+                return True
+
+            key = stateKey(state)
+            if key in failed:
+                stats.duplicate_hits += 1
+                return False
+
+            # Stop when the node or time budget is spent (the positions on the path are not proven to fail)
+            if (max_nodes is not None and stats.expanded_nodes >= max_nodes) or (max_time is not None and time.perf_counter() - startTime >= max_time):
+                stats.budget_exhausted = True
+                return False
+
+            stats.expanded_nodes += 1
+            if len(path) > len(bestPath) or (len(path) == len(bestPath) and h_value < best_h):
+                bestPath, bestState, best_h = list(path), state, h_value
+
+            if progress_callback is not None and stats.expanded_nodes >= nextProgress:
+                nextProgress += progress_interval
+                self.UpdateDepthFirstStats(stats, failed, startTime)
+                progress_callback(stats)
+
+            for child, h_child in self.IterChildren(state, h_value, path, stats):
+                if search(child, h_child):
+                    return True
+                if stats.budget_exhausted:
+                    return False
+
+            # Bounded set: once full, new failed positions are not stored
+            if len(failed) < self.failed_size:
+                failed.add(key)
+
+            return False
+
+        solved = False
+        if self.pruning is None or self.pruning.IsSolvable(initialState):
+            solved = search(initialState, initial_h)
+
+        self.UpdateDepthFirstStats(stats, failed, startTime)
+        stats.solved = solved
+        stats.solution_length = len(path) if solved else None
+
+        self.exploredNodes = stats.expanded_nodes
+        self.solution = [ jumps[move] for move in path ] if solved else None
+        self.bestPath = self.solution if solved else [ jumps[move] for move in bestPath ]
+        self.bestNode = AStar_Node(goalState if solved else bestState, None, len(self.bestPath), 0 if solved else best_h)
+        stats.best_pieces = self.bestNode.game_state.bit_count()
+
+        if (showResult):
+            if (solved):
+                self.PrintSolution(self.solution, stats)
+            else:
+                self.PrintNoSolution(stats)
+
+        return stats
@@ -0,0 +1,303 @@
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from numpy.typing import NDArray
+from AStar_Algorithm import AStar_Algorithm, AStar_Node
+from Boards import Jump
+from Pruning import PositionPruning
+from SearchStats import SearchStats
+
+# Smallest memory limit accepted, and smallest block read from every run while merging
+MIN_MEMORY_LIMIT = 1 << 20
+MIN_MERGE_BLOCK = 4096
+
+# Arrays of 8 bytes per child alive at once while a run is written: the chunk of parents and the children
+# of the current jump, the pending children and their concatenation, the temporaries of the pruning mask
+# and of the canonical forms, and the removal of the duplicates (_sortedUnique)
+RUN_TEMPORARIES = 10
+
+# Arrays of 8 bytes per value of the merge blocks alive at once: the blocks, their concatenation, the removal
+# of the duplicates and its result, and the arrays of the previous round until they are replaced
+MERGE_TEMPORARIES = 6
+
+def _sortedUnique(values: NDArray) -> NDArray:
+    # Sorted values without duplicates, sorted in place: lighter than np.unique, whose first call also imports numpy.ma
+    values.sort()
+    if len(values) < 2:
+        return values
+    keep = np.empty(len(values), dtype=bool)
+    keep[0] = True
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return values[keep]
+
+class ExternalMemory_Algorithm(AStar_Algorithm):
+    """
+    Class implementing an external memory search for the Peg Solitaire game, for the searches whose
+    open and close lists do not fit in RAM.
+    Every move removes one piece, so the positions of a layer (same number of pieces) can only be
+    reached from the previous layer and the duplicates only have to be removed inside a layer: the
+    search goes layer by layer from the initial state down to the pieces of the goal, and every layer
+    is a sorted file of packed bitboards (uint64) on disk. The children of a layer are generated by
+    chunks, written as sorted runs and merged into the next layer (duplicates are removed by the merge).
+    The files are read through memory maps, always in order.
+
+    The search is only an exhaustive breadth first search, not an A* on disk: every layer holds all the
+    positions reachable with its number of pieces (but the pruned ones), the heuristic is not used to
+    order or cut them. It fits mid-game positions and small boards; a full board takes as long as
+    enumerating it (minutes for the English board, where A_Star takes seconds).
+
+    The arrays of the search (chunks, pending children and their temporaries, merge blocks) are sized
+    from memory_limit and do not grow with the size of the search; the tables of the solver (jump table,
+    pruning, heuristic) come on top. The solution is rebuilt backward from the goal with reverse jumps
+    and binary searches in the layer files, so no parent is stored.
+
+    Attributes:
+        memory_limit (int): Bytes used by the arrays of the search (the tables of the solver come on top).
+        spill_dir (str): Directory of the temporary layer files (the system one by default).
+        spilledBytes (int): Bytes written to disk by the last search.
+
+    Methods:
+        External_Search():
+            Implements the external memory search to find the solution to the Peg Solitaire game.
+    """
+
+    def __init__(self, board = "english", heuristic = "manhattan", use_symmetry: bool = True, use_pruning: bool = True, memory_limit: int = 256 << 20, spill_dir: str = None):
+        """
+        Initializes the external memory search.
+
+        Parameters:
+            board (str | list[str] | NDArray): The name of the board (see Boards.BOARDS) or a custom mask.
+            heuristic (str | Heuristic): The name of the heuristic (see Heuristics.HEURISTICS) or a heuristic object
+                (only printed, the search is exhaustive).
+            use_symmetry (bool): Store the symmetric copies of a position as one (symmetries that keep the start and the goal).
+            use_pruning (bool): Reject the children that can never reach the goal.
+            memory_limit (int): Bytes used by the arrays of the search (at least 1 MB).
+            spill_dir (str): Directory of the temporary layer files (the system one by default).
+        """
+        super().__init__(board, heuristic, use_symmetry, use_pruning)
+        if len(self.cell_coords) > 64:
+            raise ValueError("The external memory search supports boards of up to 64 holes")
+        if memory_limit < MIN_MEMORY_LIMIT:
+            raise ValueError(f"The memory limit must be at least {MIN_MEMORY_LIMIT} bytes")
+
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.spilledBytes = 0
+
+    def __readRun(self, path: str) -> NDArray:
+        # Memory map of a file of packed bitboards (an empty file can not be mapped)
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=np.uint64)
+        return np.memmap(path, dtype=np.uint64, mode="r")
+
+    def __writeRun(self, path: str, states: NDArray) -> str:
+        states.tofile(path)
+        self.spilledBytes += states.nbytes
+        return path
+
+    def __expandLayer(self, layerPath: str, runPrefix: str, permutations: list, stats: SearchStats, deadline: float) -> list[str]:
+        # Sorted runs of the children of a layer, None if the time budget ends before the whole layer is expanded.
+        # A run holds the children that fit in the memory with all their temporaries. The children of one jump are
+        # at most the parents of the chunk, so the pending children are flushed before they grow past a run
+        run_size = self.memory_limit // (8 * RUN_TEMPORARIES)
+        chunk_size = run_size
+        layer = self.__readRun(layerPath)
+        runs: list[str] = []
+        pending: list[NDArray] = []
+        pendingSize = 0
+
+        def flush():
+            nonlocal pending, pendingSize
+            children = np.concatenate(pending)
+            pending, pendingSize = [], 0
+            if self.pruning is not None:
+                alive = ~self.pruning.DeadMask(children)
+                stats.pruned_nodes += len(children) - int(np.count_nonzero(alive))
+                children = children[alive]
+
+            stats.generated_nodes += len(children)
+            runs.append(self.__writeRun(f"{runPrefix}.{len(runs)}", _sortedUnique(self.geometry.CanonicalBatch(children, permutations))))
+
+        for chunk_start in range(0, len(layer), chunk_size):
+            chunk = np.array(layer[chunk_start:chunk_start + chunk_size])
+            stats.expanded_nodes += len(chunk)
+            for need_mask, to_mask, move_mask in zip(self.geometry.need_masks, self.geometry.to_masks, self.geometry.move_masks):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return None
+
+                # The from and over holes must have a piece and the to hole must be empty
+                children = chunk[((chunk & need_mask) == need_mask) & ((chunk & to_mask) == 0)] ^ move_mask
+                if len(children) == 0:
+                    continue
+
+                # The pending children never grow past a run
+                if pendingSize + len(children) > run_size:
+                    flush()
+                pending.append(children)
+                pendingSize += len(children)
+
+        if pending:
+            flush()
+
+        return runs
+
+    def __mergeRuns(self, runs: list[str], outputPath: str, deadline: float) -> int:
+        # K-way merge of sorted runs into one sorted file without duplicates, by blocks: every round takes
+        # from every run the values up to the smallest last value of the blocks still to be continued.
+        # None if the time budget ends before the merge is finished
+        block_size = max(MIN_MERGE_BLOCK, self.memory_limit // (8 * MERGE_TEMPORARIES * max(len(runs), 1)))
+        arrays = [ self.__readRun(path) for path in runs ]
+        positions = [ 0 ] * len(arrays)
+        written = 0
+
+        with open(outputPath, "wb") as output:
+            while any(position < len(array) for position, array in zip(positions, arrays)):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return None
+
+                blocks = [ np.array(array[position:position + block_size]) for position, array in zip(positions, arrays) ]
+                limits = [ block[-1] for block, position, array in zip(blocks, positions, arrays) if position + block_size < len(array) ]
+                cutoff = min(limits) if limits else None
+
+                parts = []
+                for index, block in enumerate(blocks):
+                    taken = len(block) if cutoff is None else int(np.searchsorted(block, cutoff, side="right"))
+                    parts.append(block[:taken])
+                    positions[index] += taken
+
+                merged = _sortedUnique(np.concatenate(parts))
+                merged.tofile(output)
+                written += len(merged)
+
+        self.spilledBytes += written * 8
+        return written
+
+    def __mergeLayer(self, runs: list[str], layerPath: str, deadline: float) -> int:
+        # The runs merged at once are limited by the memory, more runs are merged in several passes.
+        # None if the time budget ends before the layer is complete (the files left are removed with the directory)
+        fan_in = max(2, self.memory_limit // (8 * MERGE_TEMPORARIES * MIN_MERGE_BLOCK))
+        passNumber = 0
+        while len(runs) > fan_in:
+            merged = []
+            for group_start in range(0, len(runs), fan_in):
+                group = runs[group_start:group_start + fan_in]
+                mergedPath = f"{layerPath}.pass{passNumber}.{len(merged)}"
+                if self.__mergeRuns(group, mergedPath, deadline) is None:
+                    return None
+                merged.append(mergedPath)
+                for path in group:
+                    os.remove(path)
+            runs = merged
+            passNumber += 1
+
+        size = self.__mergeRuns(runs, layerPath, deadline)
+        if size is None:
+            return None
+        for path in runs:
+            os.remove(path)
+        return size
+
+    def __contains(self, layerPath: str, key: int) -> bool:
+        layer = self.__readRun(layerPath)
+        index = int(np.searchsorted(layer, np.uint64(key)))
+        return index < len(layer) and int(layer[index]) == key
+
+    def __pathTo(self, state: int, layerPaths: list[str], stateKey) -> list[Jump]:
+        # Moves from the initial state to a position of the last layer: a reverse jump from every position
+        # leads to a position stored in the previous layer
+        path: list[Jump] = []
+        for layerPath in reversed(layerPaths[:-1]):
+            for jump in self.jumps:
+                if (state & jump.to_mask) and not (state & jump.need_mask) and self.__contains(layerPath, stateKey(state ^ jump.move_mask)):
+                    path.append(jump)
+                    state ^= jump.move_mask
+                    break
+        path.reverse()
+        return path
+
+    def External_Search(self, showResult=True, max_time: float = None) -> SearchStats:
+        """
+        Implements the external memory search to find the solution to the Peg Solitaire game.
+        The output is the same as the one of A_Star.
+
+        Parameters:
+            showResult (bool): Print the solution and the statistics.
+            max_time (float): Stop the search after this number of seconds (None for no limit).
+
+        Returns:
+            SearchStats: The statistics of the search (peak_open_size is the largest layer,
+                peak_closed_size the positions stored on disk).
+        """
+        stats = SearchStats("External")
+        startTime = time.perf_counter()
+        deadline = startTime + max_time if max_time is not None else None
+
+        initialState = self.GetGameBitboard()
+        goalState = self.GetObjetiveBitboard()
+        if (showResult):
+            self.PrintInitialHeuristic(self.heuristic.Evaluate(initialState))
+
+        self.pruning = PositionPruning(self, goalState) if self.use_pruning else None
+
+        # Only the symmetries that also keep the initial state: the canonical form of a reachable position is reachable
+        initialSymmetries = self.geometry.GoalSymmetries(initialState)
+        permutations = [ permutation for permutation in self.symmetries[1:] if permutation in initialSymmetries ] if self.use_symmetry else []
+        symmetryTables = [ self.geometry.GetSymmetryTables(permutation) for permutation in permutations ]
+        def stateKey(state: int) -> int:
+            return self.geometry.Canonical(state, symmetryTables)
+
+        self.spilledBytes = 0
+        directory = tempfile.mkdtemp(prefix="peg_solitaire_", dir=self.spill_dir)
+        try:
+            layerPaths = [ self.__writeRun(os.path.join(directory, "layer0"), np.array([ stateKey(initialState) ], dtype=np.uint64)) ]
+            depth = initialState.bit_count() - goalState.bit_count()
+            if depth < 0 or (self.pruning is not None and not self.pruning.IsSolvable(initialState)):
+                depth = 0
+
+            stats.peak_open_size = stats.peak_closed_size = 1
+            for index in range(1, depth + 1):
+                layerPath = os.path.join(directory, f"layer{index}")
+                generated = stats.generated_nodes
+                runs = self.__expandLayer(layerPaths[-1], layerPath, permutations, stats, deadline)
+                size = self.__mergeLayer(runs, layerPath, deadline) if runs is not None else None
+                if size is None:
+                    # The incomplete layer is dropped, the search ends in the deepest complete one
+                    stats.budget_exhausted = True
+                    break
+
+                # Every child not stored in its layer was a duplicate removed by the merge
+                stats.duplicate_hits += (stats.generated_nodes - generated) - size
+                stats.peak_open_size = max(stats.peak_open_size, size)
+                stats.peak_closed_size += size
+                if size == 0:
+                    os.remove(layerPath)
+                    break
+                layerPaths.append(layerPath)
+
+            solved = len(layerPaths) == depth + 1 and self.__contains(layerPaths[-1], stateKey(goalState))
+
+            # The path to the goal, or to the first position of the deepest layer
+            lastState = goalState if solved else int(self.__readRun(layerPaths[-1])[0])
+            path = self.__pathTo(lastState, layerPaths, stateKey)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        stats.elapsed_time = time.perf_counter() - startTime
+        stats.solved = solved
+        stats.solution_length = len(path) if solved else None
+
+        self.exploredNodes = stats.expanded_nodes
+        self.solution = path if solved else None
+        self.bestPath = path
+        self.bestNode = AStar_Node(lastState, None, len(path), 0)
+        stats.best_pieces = lastState.bit_count()
+
+        if (showResult):
+            if (solved):
+                self.PrintSolution(self.solution, stats)
+            else:
+                self.PrintNoSolution(stats)
+
+        return stats
@@ -0,0 +1,343 @@
+import heapq
+import itertools
+import multiprocessing
+import os
+import queue
+import time
+from AStar_Algorithm import AStar_Algorithm
+from Pruning import PositionPruning
+from SearchStats import SearchStats
+
+# Algoritmo de referencia, tomado de:
+# Kishimoto, Fukunaga, Botea. "Scalable, Parallel Best-First Search for Optimal Sequential Planning" (HDA*)
+
+# Maximum number of batches a worker takes from its inbox between two expansions, so a worker flooded
+# by the others still expands its own nodes and checks for the end of the search
+MAX_RECEIVED_BATCHES = 64
+
+# Seconds the workers have to report their statistics and the parents of the path once the search is over
+COLLECT_TIMEOUT = 30
+
+def _owner(key: int, workers: int) -> int:
+    # Multiplicative hashing of the state key, so neighbouring bitboards end up in different workers
+    return (((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % workers
+
+def _worker(index: int, workers: int, options: dict, start: int, goal: int, inboxes: list, results, sent, received, idle, stop, batch_size: int) -> None:
+    solver = AStar_Algorithm(**options)
+    solver.SetGameBitboard(start)
+    solver.SetObjetiveBitboard(goal)
+    solver.pruning = PositionPruning(solver, goal) if solver.use_pruning else None
+
+    stateKey = solver.CanonicalBitboard if solver.use_symmetry else int
+    jumps = solver.jumps
+    inbox = inboxes[index]
+
+    # Open list of (f, h, insertion order, state, g), close list and best g of the states owned by this worker
+    openList: list[tuple] = []
+    closeList: set = set()
+    bestG: dict[int, int] = {}
+    # Parent of every accepted state (by its real state, so the path is made of real moves)
+    parents: dict[int, tuple[int, int]] = {}
+    insertionOrder = itertools.count()
+    outbox: list[list[tuple]] = [ [] for _ in range(workers) ]
+
+    stats = { "worker": index, "expanded_nodes": 0, "generated_nodes": 0, "duplicate_hits": 0, "received_nodes": 0, "sent_nodes": 0, "peak_open_size": 0 }
+
+    def accept(state: int, g: int, h_value, parent: int, move: int):
+        key = stateKey(state)
+        if key in closeList or g >= bestG.get(key, g + 1):
+            stats["duplicate_hits"] += 1
+            return
+
+        bestG[key] = g
+        parents[state] = (parent, move)
+        heapq.heappush(openList, (g + h_value, h_value, next(insertionOrder), state, g))
+
+    def send(owner: int):
+        # The counter is increased before the batch is sent, so a batch in flight is always counted
+        sent[index] += 1
+        stats["sent_nodes"] += len(outbox[owner])
+        inboxes[owner].put(outbox[owner])
+        outbox[owner] = []
+
+    def flush():
+        for owner in range(workers):
+            if outbox[owner]:
+                send(owner)
+
+    if _owner(stateKey(start), workers) == index and (solver.pruning is None or solver.pruning.IsSolvable(start)):
+        accept(start, 0, solver.heuristic.Evaluate(start), None, None)
+
+    while not stop.is_set():
+        # 1. Receive the nodes sent by the other workers (waiting for them when there is nothing to expand)
+        batches = []
+        try:
+            if not openList:
+                flush()
+                idle[index] = 1
+                batches.append(inbox.get(timeout=0.01))
+            while len(batches) < MAX_RECEIVED_BATCHES and not stop.is_set():
+                batches.append(inbox.get_nowait())
+        except queue.Empty:
+            pass
+
+        # A goal was found or the time is over: the received nodes are not needed anymore
+        if stop.is_set():
+            break
+
+        if batches:
+            # Busy again before the batches are counted, so the termination check never sees an idle worker with work
+            idle[index] = 0
+            received[index] += len(batches)
+            for batch in batches:
+                stats["received_nodes"] += len(batch)
+                for node in batch:
+                    accept(*node)
+
+        if not openList:
+            continue
+
+        # 2. Expand the best node of this worker
+        _, h_value, _, state, g = heapq.heappop(openList)
+        key = stateKey(state)
+        if key in closeList or g > bestG[key]:
+            continue
+
+        if state == goal:
+            # Every solution removes the same number of pieces, so the first goal found is optimal
+            results.put(("goal", index, state, g))
+            stop.set()
+            break
+
+        closeList.add(key)
+        stats["expanded_nodes"] += 1
+
+        moves, h_values = solver.FindPossibleMoves(state, h_value)
+        stats["generated_nodes"] += len(moves)
+        for move, h_child in zip(moves, h_values):
+            child = state ^ jumps[move].move_mask
+            owner = _owner(stateKey(child), workers)
+            if owner == index:
+                accept(child, g + 1, h_child, state, move)
+            else:
+                outbox[owner].append((child, g + 1, h_child, state, move))
+                if len(outbox[owner]) >= batch_size:
+                    send(owner)
+
+        if len(openList) > stats["peak_open_size"]:
+            stats["peak_open_size"] = len(openList)
+
+    # 3. The search is over: report the statistics and answer the parent requests of the path reconstruction
+    stats["peak_closed_size"] = len(closeList)
+    stats["pruned_nodes"] = solver.pruning.pruned if solver.pruning is not None else 0
+    results.put(("stats", index, stats))
+
+    while True:
+        message = inbox.get()
+        if message == "exit":
+            break
+        if isinstance(message, tuple):
+            results.put(("parent", parents.get(message[1])))
+
+    # The batches still queued for other workers are not needed anymore
+    for other in inboxes:
+        other.cancel_join_thread()
+
+class HDAStar_Algorithm(AStar_Algorithm):
+    """
+    Class implementing HDA* (hash distributed A*) for the Peg Solitaire game.
+    Every state is owned by one worker process, chosen by the hash of its key (the canonical key with
+    use_symmetry, so the symmetric copies of a state are owned and deduplicated by the same worker). Every
+    worker has its own open and close lists, expands its best node without waiting for the others and sends
+    the children owned by other workers in batches through their queues. The moves, heuristic, pruning and
+    symmetry options are the ones of AStar_Algorithm.
+
+    The workers do not follow the global order of A_Star, so they can expand more nodes than it (how many
+    depends on which worker reaches a goal first). The result is still optimal: the g of a state is the
+    number of pieces removed, so a state is never reopened with a better g, and every solution removes the
+    same number of pieces, so the first goal found ends the search. Without a goal the search ends when
+    every worker is idle and no batch is in flight.
+
+    Attributes:
+        workers (int): Number of worker processes.
+        batch_size (int): Number of nodes sent together to another worker.
+        workerStats (list[dict]): Statistics of every worker of the last search (load balance).
+
+    Methods:
+        HDA_Star():
+            Implements the HDA* algorithm to find the solution to the Peg Solitaire game.
+    """
+
+    def __init__(self, board = "english", heuristic = "manhattan", use_symmetry: bool = False, use_pruning: bool = True, workers: int = None, batch_size: int = 16):
+        """
+        Initializes the HDA* algorithm.
+
+        Parameters:
+            board (str | list[str] | NDArray): The name of the board (see Boards.BOARDS) or a custom mask.
+            heuristic (str | Heuristic): The name of the heuristic (see Heuristics.HEURISTICS) or a heuristic object.
+            use_symmetry (bool): Reduce the explored states by the symmetries of the board (opt-in).
+            use_pruning (bool): Reject the children that can never reach the goal.
+            workers (int): Number of worker processes, by default one per CPU.
+            batch_size (int): Number of nodes sent together to another worker.
+        """
+        super().__init__(board, heuristic, use_symmetry, use_pruning)
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.workerStats: list[dict] = []
+
+        # Every worker builds its own solver with the same options
+        self.__options = { "board": board, "heuristic": heuristic, "use_symmetry": use_symmetry, "use_pruning": use_pruning }
+
+    def __isTerminated(self, sent, received, idle) -> bool:
+        # Two readings of the counters: all the workers idle and no batch in flight in between
+        sent_before, received_before = sum(sent), sum(received)
+        if sent_before != received_before or not all(idle):
+            return False
+
+        return sum(sent) == sent_before and sum(received) == received_before and all(idle)
+
+    def __stopWorkers(self, processes: list) -> None:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    def __checkWorkers(self, processes: list) -> None:
+        # A worker only ends after the exit message, before it the others would wait for it forever
+        for index, process in enumerate(processes):
+            if not process.is_alive():
+                self.__stopWorkers(processes)
+                raise RuntimeError(f"The HDA* worker {index} ended during the search (exit code {process.exitcode})")
+
+    def __receive(self, results, processes: list, kind: str, deadline: float) -> tuple:
+        # Next message of this kind from the workers, checking that all of them are still running while waiting
+        # and giving up at the deadline (a worker that is alive but does not answer)
+        while True:
+            try:
+                message = results.get(timeout=0.05)
+            except queue.Empty:
+                self.__checkWorkers(processes)
+                if time.perf_counter() >= deadline:
+                    self.__stopWorkers(processes)
+                    raise RuntimeError(f"The HDA* workers did not send their {kind} messages in {COLLECT_TIMEOUT} s")
+                continue
+            if message[0] == kind:
+                return message
+
+    def HDA_Star(self, showResult=True, max_time: float = None) -> SearchStats:
+        """
+        Implements the HDA* algorithm to find the solution to the Peg Solitaire game.
+        The output is the same as the one of A_Star. If a worker process ends during the search (e.g. killed
+        by the system), or the workers do not report their results in COLLECT_TIMEOUT seconds once the search
+        is over, the workers are stopped and a RuntimeError is raised.
+
+        Parameters:
+            showResult (bool): Print the solution, the statistics and the load of every worker.
+            max_time (float): Stop the search after this number of seconds (None for no limit).
+
+        Returns:
+            SearchStats: The statistics of the search (added over all the workers).
+        """
+        stats = SearchStats("HDA*")
+        startTime = time.perf_counter()
+
+        initialState = self.GetGameBitboard()
+        goalState = self.GetObjetiveBitboard()
+        stateKey = self.CanonicalBitboard if self.use_symmetry else int
+
+        if (showResult):
+            self.PrintInitialHeuristic(self.heuristic.Evaluate(initialState))
+
+        context = multiprocessing.get_context()
+        inboxes = [ context.Queue() for _ in range(self.workers) ]
+        results = context.Queue()
+        sent = context.Array("q", self.workers, lock=False)
+        received = context.Array("q", self.workers, lock=False)
+        idle = context.Array("b", self.workers, lock=False)
+        stop = context.Event()
+
+        processes = [ context.Process(target=_worker, args=(index, self.workers, self.__options, initialState, goalState, inboxes, results, sent, received, idle, stop, self.batch_size), daemon=True) for index in range(self.workers) ]
+        for process in processes:
+            process.start()
+
+        # Wait for a goal, for the end of the search (every worker idle, nothing in flight) or for the time budget.
+        # The worker that finds the goal stops the others itself, so their statistics can come before the goal
+        goalFound = None
+        self.workerStats = []
+        while goalFound is None:
+            try:
+                message = results.get(timeout=0.05)
+                if message[0] == "goal":
+                    goalFound = message
+                elif message[0] == "stats":
+                    self.workerStats.append(message[2])
+            except queue.Empty:
+                self.__checkWorkers(processes)
+                if self.__isTerminated(sent, received, idle):
+                    break
+                if max_time is not None and time.perf_counter() - startTime >= max_time:
+                    stats.budget_exhausted = True
+                    break
+        stop.set()
+
+        # Statistics of every worker (a second goal found at the same time is ignored)
+        deadline = time.perf_counter() + COLLECT_TIMEOUT
+        while len(self.workerStats) < self.workers:
+            self.workerStats.append(self.__receive(results, processes, "stats", deadline)[2])
+        self.workerStats.sort(key=lambda worker: worker["worker"])
+
+        # Rebuild the path asking the owner of every state for its parent
+        path: list[int] = []
+        if goalFound is not None:
+            state = goalFound[2]
+            while True:
+                inboxes[_owner(stateKey(state), self.workers)].put(("parent", state))
+                parent, move = self.__receive(results, processes, "parent", deadline)[1]
+                if parent is None:
+                    break
+                path.append(move)
+                state = parent
+            path.reverse()
+
+        for inbox in inboxes:
+            inbox.put("exit")
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        for worker in self.workerStats:
+            stats.expanded_nodes += worker["expanded_nodes"]
+            stats.generated_nodes += worker["generated_nodes"]
+            stats.duplicate_hits += worker["duplicate_hits"]
+            stats.pruned_nodes += worker["pruned_nodes"]
+            stats.peak_open_size += worker["peak_open_size"]
+            stats.peak_closed_size += worker["peak_closed_size"]
+        stats.elapsed_time = time.perf_counter() - startTime
+        stats.solved = goalFound is not None
+        stats.solution_length = len(path) if goalFound is not None else None
+
+        self.exploredNodes = stats.expanded_nodes
+        self.solution = [ self.jumps[move] for move in path ] if goalFound is not None else None
+
+        if (showResult):
+            if (goalFound is not None):
+                self.PrintSolution(self.solution, stats)
+            else:
+                self.PrintNoSolution(stats)
+            if self.output_format != "jsonl":
+                self.PrintLoadBalance()
+
+        return stats
+
+    def PrintLoadBalance(self) -> None:
+        """
+        Prints the nodes expanded, sent and received by every worker of the last search.
+        """
+        expanded = [ worker["expanded_nodes"] for worker in self.workerStats ]
+        mean = sum(expanded) / len(expanded) if expanded else 0
+        for worker in self.workerStats:
+            print(f"Proceso {worker['worker']}: expandidos {worker['expanded_nodes']}, enviados {worker['sent_nodes']}, recibidos {worker['received_nodes']}")
+        if mean > 0:
+            print(f"Balance de carga (máximo / media): {max(expanded) / mean:.3f}")
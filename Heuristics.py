@@ -0,0 +1,265 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from numpy.typing import NDArray
+from PegSolitaire import PegSolitaire
+
+class Heuristic(ABC):
+    """
+    Base class of the heuristics used by the search algorithms.
+    Every heuristic can score a single bitboard or all the children of an expansion
+    (or any batch of bitboards) in one vectorized call. The batches are uint64 arrays, so on boards
+    of more than 64 holes the bitboards are scored one by one with EvaluateBitboard.
+
+    Attributes:
+        name (str): The name of the heuristic.
+        game (PegSolitaire): The game (board) the heuristic was built for.
+        vectorized (bool): True if the board fits in uint64 bitboards (up to 64 holes).
+    """
+    name = "heuristic"
+
+    def __init__(self, game: PegSolitaire) -> None:
+        self.game = game
+        self.cell_count = len(game.cell_coords)
+        self.vectorized = self.cell_count <= 64
+
+        self.shifts = self.move_masks = None
+        if self.vectorized:
+            self.shifts = np.arange(self.cell_count, dtype=np.uint64)
+
+            # Masks of every jump of the board, to build the children bitboards in batch
+            self.move_masks = np.array([ jump.move_mask for jump in game.jumps ], dtype=np.uint64)
+
+    def UnpackBits(self, states: NDArray) -> NDArray:
+        """
+        Unpacks a batch of bitboards.
+
+        Parameters:
+            states (NDArray): Array of uint64 bitboards.
+
+        Returns:
+            NDArray: Matrix (number of states x number of holes) with 1 where there is a piece.
+        """
+        return ((states[:, None] >> self.shifts) & np.uint64(1)).astype(np.int64)
+
+    def Evaluate(self, state: int):
+        """
+        Evaluates a single bitboard.
+
+        Parameters:
+            state (int): The bitboard.
+
+        Returns:
+            int | float: The heuristic value of the state.
+        """
+        if not self.vectorized:
+            return self.EvaluateBitboard(state)
+
+        return self.EvaluateBatch(np.array([state], dtype=np.uint64)).tolist()[0]
+
+    @abstractmethod
+    def EvaluateBitboard(self, state: int):
+        """
+        Evaluates a single bitboard with integer operations (any board size).
+
+        Parameters:
+            state (int): The bitboard.
+
+        Returns:
+            int | float: The heuristic value of the state.
+        """
+
+    @abstractmethod
+    def EvaluateBatch(self, states: NDArray) -> NDArray:
+        """
+        Evaluates a batch of bitboards.
+
+        Parameters:
+            states (NDArray): Array of uint64 bitboards.
+
+        Returns:
+            NDArray: The heuristic value of every state.
+        """
+
+    def EvaluateChildren(self, state: int, h_value, moves: list[int]) -> NDArray:
+        """
+        Evaluates all the children of an expansion.
+
+        Parameters:
+            state (int): The bitboard of the parent.
+            h_value (int | float): The heuristic value of the parent.
+            moves (list[int]): Index in the jump table of the jump made to reach every child.
+
+        Returns:
+            NDArray: The heuristic value of every child.
+        """
+        if not self.vectorized:
+            return np.array([ self.EvaluateBitboard(state ^ self.game.jumps[move].move_mask) for move in moves ])
+
+        return self.EvaluateBatch(np.uint64(state) ^ self.move_masks[moves])
+
+    def EvaluateChildrenBatch(self, children: NDArray, parent_h: NDArray, moves: NDArray) -> NDArray:
+        """
+        Evaluates the children of many expansions at once.
+
+        Parameters:
+            children (NDArray): The bitboards of the children (uint64).
+            parent_h (NDArray): The heuristic value of the parent of every child.
+            moves (NDArray): Index in the jump table of the jump made to reach every child.
+
+        Returns:
+            NDArray: The heuristic value of every child.
+        """
+        return self.EvaluateBatch(children)
+
+    def IsInvariant(self, permutation: tuple[int]) -> bool:
+        """
+        Checks if the heuristic keeps its value when the bits are permuted by a symmetry of the board.
+
+        Parameters:
+            permutation (tuple[int]): The new position of every bit.
+
+        Returns:
+            bool: True if h(state) == h(permuted state) for every state.
+        """
+        return False
+
+class PositionTableHeuristic(Heuristic):
+    """
+    Heuristic computed as the sum of the weights of the holes that have a piece.
+    As every jump only changes 3 holes, the value of a child is the value of its parent
+    plus a precomputed difference of the jump.
+
+    Attributes:
+        weights (NDArray): The weight of every hole (one per bit).
+        deltas (NDArray): The change of the heuristic made by every jump of the jump table.
+    """
+    name = "table"
+
+    def __init__(self, game: PegSolitaire, weights) -> None:
+        super().__init__(game)
+        self.weights = np.asarray(weights)
+        self.deltas = np.array([ self.weights[jump.to_bit] - self.weights[jump.from_bit] - self.weights[jump.over_bit] for jump in game.jumps ])
+
+    def EvaluateBatch(self, states: NDArray) -> NDArray:
+        return self.UnpackBits(states) @ self.weights
+
+    def EvaluateBitboard(self, state: int):
+        return sum((self.weights[bit] for bit in range(self.cell_count) if (state >> bit) & 1), start=self.weights.dtype.type(0)).item()
+
+    def EvaluateChildren(self, state: int, h_value, moves: list[int]) -> NDArray:
+        return self.deltas[moves] + h_value
+
+    def EvaluateChildrenBatch(self, children: NDArray, parent_h: NDArray, moves: NDArray) -> NDArray:
+        return self.deltas[moves] + parent_h
+
+    def IsInvariant(self, permutation: tuple[int]) -> bool:
+        return bool(np.array_equal(self.weights[list(permutation)], self.weights))
+
+class ManhattanHeuristic(PositionTableHeuristic):
+    """
+    Sum of the Manhattan distances from every piece to the center of the board.
+    """
+    name = "manhattan"
+
+    def __init__(self, game: PegSolitaire) -> None:
+        weights = [ abs(game.CENTER_Y - y) + abs(game.CENTER_X - x) for (y, x) in game.cell_coords ]
+        super().__init__(game, weights)
+
+class WeightedPositionHeuristic(PositionTableHeuristic):
+    """
+    Sum of the weights of the holes that have a piece.
+    By default the weight of a hole grows as the number of jumps it takes part in decreases,
+    so the pieces in corners and arm ends (the hardest to remove) cost more.
+    """
+    name = "weighted"
+
+    def __init__(self, game: PegSolitaire, weights = None) -> None:
+        if weights is None:
+            mobility = np.zeros(len(game.cell_coords), dtype=np.int64)
+            for jump in game.jumps:
+                mobility[[jump.from_bit, jump.over_bit, jump.to_bit]] += 1
+            weights = mobility.max() - mobility + 1
+
+        super().__init__(game, weights)
+
+class IsolatedPegsHeuristic(Heuristic):
+    """
+    Number of pieces without any piece in their orthogonally adjacent holes.
+    An isolated piece can not move nor be jumped until another piece gets next to it.
+    """
+    name = "isolated"
+
+    def __init__(self, game: PegSolitaire) -> None:
+        super().__init__(game)
+
+        # Adjacency matrix of the holes of the board
+        self.adjacency = np.zeros((self.cell_count, self.cell_count), dtype=np.int64)
+        for bit, (y, x) in enumerate(game.cell_coords):
+            for dx, dy in ((0, -1), (0, 1), (1, 0), (-1, 0)):
+                if 0 <= x + dx < game.GAME_SIZE and 0 <= y + dy < game.GAME_SIZE and game.cell_index[y + dy][x + dx] >= 0:
+                    self.adjacency[bit, game.cell_index[y + dy][x + dx]] = 1
+
+        # Mask of the neighbours of every hole, for the integer evaluation
+        self.neighbour_masks = [ sum(1 << int(other) for other in np.flatnonzero(row)) for row in self.adjacency ]
+
+    def EvaluateBatch(self, states: NDArray) -> NDArray:
+        pieces = self.UnpackBits(states)
+        neighbours = pieces @ self.adjacency
+        return (pieces * (neighbours == 0)).sum(axis=1)
+
+    def EvaluateBitboard(self, state: int):
+        return sum(1 for bit in range(self.cell_count) if (state >> bit) & 1 and not state & self.neighbour_masks[bit])
+
+    def IsInvariant(self, permutation: tuple[int]) -> bool:
+        # The symmetries of the board keep the adjacency of the holes
+        return True
+
+class CombinedHeuristic(Heuristic):
+    """
+    Weighted sum of other heuristics.
+
+    Attributes:
+        components (list[tuple[float, Heuristic]]): The (weight, heuristic) pairs.
+    """
+    name = "combined"
+
+    def __init__(self, game: PegSolitaire, components: list[tuple[float, Heuristic]] = None) -> None:
+        super().__init__(game)
+        if components is None:
+            components = [ (1, ManhattanHeuristic(game)), (2, IsolatedPegsHeuristic(game)) ]
+        self.components = components
+
+    def EvaluateBatch(self, states: NDArray) -> NDArray:
+        return sum(weight * heuristic.EvaluateBatch(states) for weight, heuristic in self.components)
+
+    def EvaluateBitboard(self, state: int):
+        return sum(weight * heuristic.EvaluateBitboard(state) for weight, heuristic in self.components)
+
+    def IsInvariant(self, permutation: tuple[int]) -> bool:
+        return all(heuristic.IsInvariant(permutation) for _, heuristic in self.components)
+
+HEURISTICS = {
+    "manhattan": ManhattanHeuristic,
+    "weighted": WeightedPositionHeuristic,
+    "isolated": IsolatedPegsHeuristic,
+    "combined": CombinedHeuristic,
+}
+
+def CreateHeuristic(heuristic, game: PegSolitaire) -> Heuristic:
+    """
+    Creates a heuristic for a game.
+
+    Parameters:
+        heuristic (str | Heuristic): The name of the heuristic (see HEURISTICS) or an already built heuristic.
+        game (PegSolitaire): The game (board) of the heuristic.
+
+    Returns:
+        Heuristic: The heuristic.
+    """
+    if isinstance(heuristic, Heuristic):
+        return heuristic
+
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic '{heuristic}', expected one of: {', '.join(HEURISTICS)}")
+
+    return HEURISTICS[heuristic](game)
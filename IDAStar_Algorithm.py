@@ -0,0 +1,135 @@
+import math
+import time
+from AStar_Algorithm import AStar_Algorithm
+from Pruning import PositionPruning
+from SearchStats import SearchStats
+
+# Algoritmo de referencia, tomado de:
+# https://en.wikipedia.org/wiki/Iterative_deepening_A*
+
+class IDAStar_Algorithm(AStar_Algorithm):
+    """
+    Class implementing the IDA* (iterative deepening A*) algorithm for the Peg Solitaire game.
+    It uses the same board, move rules, heuristic, pruning and symmetry options as AStar_Algorithm,
+    but it only keeps the moves of the current path (see AStar_Algorithm.IterChildren), so its memory does not grow with the size of the search.
+
+    Attributes:
+        transposition_size (int): Maximum number of entries of the transposition table (0 to disable it).
+
+    Methods:
+        IDA_Star():
+            Implements the IDA* algorithm to find the solution to the Peg Solitaire game.
+    """
+
+    def __init__(self, board = "english", heuristic = "manhattan", use_symmetry: bool = False, use_pruning: bool = True, transposition_size: int = 1000000):
+        """
+        Initializes the IDA* algorithm.
+
+        Parameters:
+            board (str | list[str] | NDArray): The name of the board (see Boards.BOARDS) or a custom mask.
+            heuristic (str | Heuristic): The name of the heuristic (see Heuristics.HEURISTICS) or a heuristic object.
+            use_symmetry (bool): Share the transposition table entries between the symmetric copies of a state.
+            use_pruning (bool): Reject the children that can never reach the goal.
+            transposition_size (int): Maximum number of entries of the transposition table (0 to disable it).
+        """
+        super().__init__(board, heuristic, use_symmetry, use_pruning)
+        self.transposition_size = transposition_size
+
+    def IDA_Star(self, showResult=True, progress_callback = None, progress_interval: int = 10000) -> SearchStats:
+        """
+        Implements the IDA* algorithm to find the solution to the Peg Solitaire game.
+        The output is the same as the one of A_Star.
+
+        Parameters:
+            showResult (bool): Print the solution and the statistics.
+            progress_callback (Callable[[SearchStats], None]): Called every progress_interval expansions.
+            progress_interval (int): Number of expansions between calls to progress_callback.
+
+        Returns:
+            SearchStats: The statistics of the search (peak_closed_size is the size of the transposition table).
+        """
+        stats = SearchStats("IDA*")
+        startTime = time.perf_counter()
+
+        initialState = self.GetGameBitboard()
+        goalState = self.GetObjetiveBitboard()
+        stateKey = self.CanonicalBitboard if self.use_symmetry else int
+        jumps = self.jumps
+
+        initial_h = self.heuristic.Evaluate(initialState)
+        if (showResult):
+            self.PrintInitialHeuristic(initial_h)
+
+        self.pruning = PositionPruning(self, goalState) if self.use_pruning else None
+
+        # Transposition table: state -> (bound searched, smallest f found over that bound)
+        # The g of a state is always its number of removed pieces, so the same state is never cheaper by another path
+        transpositions: dict[int, tuple[float, float]] = {}
+
+        # The search keeps only the moves made to reach the current state
+        path: list[int] = []
+        nextProgress = progress_interval
+
+        def search(state: int, g: int, h_value, bound: float) -> float:
+            nonlocal nextProgress
+
+            f_value = g + h_value
+            if f_value > bound:
+                return f_value
+
+            if state == goalState:
+                return -1
+
+            key = stateKey(state)
+            entry = transpositions.get(key)
+            if entry is not None and entry[0] >= bound:
+                stats.duplicate_hits += 1
+                return entry[1]
+
+            stats.expanded_nodes += 1
+            if progress_callback is not None and stats.expanded_nodes >= nextProgress:
+                nextProgress += progress_interval
+                self.UpdateDepthFirstStats(stats, transpositions, startTime)
+                progress_callback(stats)
+
+            minimum = math.inf
+            for child, h_child in self.IterChildren(state, h_value, path, stats):
+                result = search(child, g + 1, h_child, bound)
+                if result < 0:
+                    return result
+                if result < minimum:
+                    minimum = result
+
+            # Bounded table: once full, only the states already stored are updated
+            if entry is not None or len(transpositions) < self.transposition_size:
+                transpositions[key] = (bound, minimum)
+
+            return minimum
+
+        bound = initial_h
+        solved = False
+        if self.pruning is None or self.pruning.IsSolvable(initialState):
+            while True:
+                result = search(initialState, 0, initial_h, bound)
+                if result < 0:
+                    solved = True
+                    break
+                if result == math.inf:
+                    break
+
+                bound = result
+
+        self.UpdateDepthFirstStats(stats, transpositions, startTime)
+        stats.solved = solved
+        stats.solution_length = len(path) if solved else None
+
+        self.exploredNodes = stats.expanded_nodes
+        self.solution = [ jumps[move] for move in path ] if solved else None
+
+        if (showResult):
+            if (solved):
+                self.PrintSolution(self.solution, stats)
+            else:
+                self.PrintNoSolution(stats)
+
+        return stats
@@ -1,149 +1,182 @@
 import numpy as np
 from numpy.typing import NDArray
+from Boards import BoardGeometry, GetBoardGeometry
+from Rendering import BoardRenderer
 
 class PegSolitaire:
     """
     Class representing the Peg Solitaire game.
 
     Attributes:
+        BOARD (str): The name of the board.
         GAME_SIZE (int): The size of the game board.
         CENTER_X (int): The x-coordinate of the center of the board.
         CENTER_Y (int): The y-coordinate of the center of the board.
-        game_board (NDArray): The current state of the game board.
+        cell_coords (list[tuple[int, int]]): (y, x) coordinates of the hole of every bit of the bitboard.
+        cell_index (list[list[int]]): Bit of every (y, x) cell, -1 outside of the board.
+        jumps (list[Jump]): Table with all the legal (from, over, to) jumps of the board.
     """
-    # Classic board
-    GAME_SIZE = 7
-    CENTER_X = 3
-    CENTER_Y = 3
 
-    # Square board
-    #GAME_SIZE = 6
-    #CENTER_X = 3
-    #CENTER_Y = 2
+    def __init__(self, board = "english", center: tuple[int, int] = None):
+        """
+        Initializes the PegSolitaire game with a given board.
 
-    # German board
-    # GAME_SIZE = 9
-    # CENTER_X = 4
-    # CENTER_Y = 4
+        Parameters:
+            board (str | list[str] | NDArray): The name of the board (see Boards.BOARDS) or a custom mask.
+            center (tuple[int, int]): (x, y) coordinates of the center, by default the one of the board.
+        """
+        self.__initializeBoard(GetBoardGeometry(board, center))
+        self.__initializeObjectiveMatrix()
+        self.__symmetryFilters = []
+        self.__initializeSymmetries()
+
+        # Start position, by default every hole but the center has a piece
+        self.startState: int = None
+
+        # Built on the first print
+        self.renderer: BoardRenderer = None
+
+    # Take the board layout and its precomputed jump table
+    def __initializeBoard(self, geometry: BoardGeometry):
+        self.geometry = geometry
+        self.BOARD = geometry.name
+        self.GAME_SIZE = geometry.GAME_SIZE
+        self.CENTER_X = geometry.CENTER_X
+        self.CENTER_Y = geometry.CENTER_Y
+
+        # Every playable hole has one bit in the bitboard
+        self.cell_coords = geometry.cell_coords
+        self.cell_index = geometry.cell_index
+        self.full_mask = geometry.full_mask
+        self.jumps = geometry.jumps
+
+    # Create an empty matrix of the board (-1 outside the board)
+    def __createBoardMatrix(self, value: int) -> NDArray:
+        matrix = np.full((self.GAME_SIZE, self.GAME_SIZE), -1, dtype=object)
+        matrix[self.geometry.GetMask()] = value
+        return matrix
 
-    def __init__(self):
+    # Create a matrix to represent the goal state
+    def __initializeObjectiveMatrix(self):
         """
-        Initializes the PegSolitaire game with a given board size.
+        Initializes the objective matrix for the game.
+        The objective matrix represents the goal state of the game.
+        """
+        self.goalMatrix = self.__createBoardMatrix(0)
+
+        # Set the only piece in the center of the matrix
+        self.goalMatrix[self.CENTER_Y, self.CENTER_X] = 1
+
+    # Keep the rotations/reflections of the board that also keep the goal state unchanged
+    def __initializeSymmetries(self):
+        """
+        Initializes the symmetry group of the game.
+        Only the symmetries of the board shape that keep the goal state unchanged are used, so a
+        symmetric copy of a state is exactly as far from the goal as the state itself.
+        Asymmetric boards or goals simply end up with the identity only.
+        """
+        goal = self.MatrixToBitboard(self.goalMatrix)
+
+        # Permutation of the bits for every valid symmetry (the identity is always the first one)
+        self.__setSymmetries(self.geometry.GoalSymmetries(goal))
+        for keep in self.__symmetryFilters:
+            self.__setSymmetries([ self.symmetries[0] ] + [ permutation for permutation in self.symmetries[1:] if keep(permutation) ])
+
+    # Set the symmetry group and the lookup tables used to transform a whole byte of the bitboard at once
+    def __setSymmetries(self, symmetries: list[tuple[int]]):
+        self.symmetries = symmetries
+        self.__symmetryTables = [ self.geometry.GetSymmetryTables(permutation) for permutation in symmetries[1:] ]
+
+    # Keep only the symmetries accepted by the given function
+    def RestrictSymmetries(self, keep) -> None:
+        """
+        Restricts the symmetry group of the game, e.g. to the symmetries that keep a heuristic unchanged.
+        The restriction is kept when the goal changes.
 
         Parameters:
-            game_size (int): The size of the game board.
+            keep (Callable[[tuple[int]], bool]): Receives the permutation of the bits of a symmetry,
+                returns True to keep that symmetry.
         """
-        self.__initializeObjectiveMatrix()
+        self.__symmetryFilters.append(keep)
+        self.__setSymmetries([ self.symmetries[0] ] + [ permutation for permutation in self.symmetries[1:] if keep(permutation) ])
 
-    # Fill the matrix with -1 in all 4 corners
-    def __initializeMatrixCorners(self, matrix: NDArray):
-        matrix[0, 0] = -1
-        matrix[0, 1] = -1
-        matrix[0, -1] = -1
-        matrix[0, -2] = -1
+    # Get the representative of a state among all its symmetric copies
+    def CanonicalBitboard(self, state: int) -> int:
+        """
+        Gets the canonical form of a bitboard under the symmetry group of the board.
+        All rotated and mirrored copies of a state share the same canonical form.
 
-        matrix[-1, 0] = -1
-        matrix[-1, 1] = -1
-        matrix[-1, -1] = -1
-        matrix[-1, -2] = -1
+        Parameters:
+            state (int): The bitboard.
 
-        matrix[1, 0] = -1
-        matrix[1, 1] = -1
-        matrix[1, -1] = -1
-        matrix[1, -2] = -1
+        Returns:
+            int: The smallest bitboard among all the symmetric copies of the state.
+        """
+        return self.geometry.Canonical(state, self.__symmetryTables)
 
-        matrix[-2, 1] = -1
-        matrix[-2, 0] = -1
-        matrix[-2, -2] = -1
-        matrix[-2, -1] = -1
+    # Canonical form of many states at once
+    def CanonicalBitboards(self, states: NDArray) -> NDArray:
+        """
+        Vectorized CanonicalBitboard for many bitboards at once (boards of up to 64 holes).
 
-        return matrix
+        Parameters:
+            states (NDArray): The bitboards (uint64).
 
-    # Fill the matrix with -1 in the border (German board)
-    def __initializeMatrixCornersG(self, matrix: NDArray):
-        matrix[0, 0] = -1
-        matrix[0, 1] = -1
-        matrix[0, 2] = -1
-        matrix[0, -1] = -1
-        matrix[0, -2] = -1
-        matrix[0, -3] = -1
-
-        matrix[-1, 0] = -1
-        matrix[-1, 1] = -1
-        matrix[-1, 2] = -1
-        matrix[-1, -1] = -1
-        matrix[-1, -2] = -1
-        matrix[-1, -3] = -1
-
-        matrix[1, 0] = -1
-        matrix[1, 1] = -1
-        matrix[1, 2] = -1
-        matrix[1, -1] = -1
-        matrix[1, -2] = -1
-        matrix[1, -3] = -1
-
-        matrix[-2, 0] = -1
-        matrix[-2, 1] = -1
-        matrix[-2, 2] = -1
-        matrix[-2, -1] = -1
-        matrix[-2, -2] = -1
-        matrix[-2, -3] = -1
-
-        matrix[2, 0] = -1
-        matrix[2, 1] = -1
-        matrix[2, 2] = -1
-        matrix[2, -1] = -1
-        matrix[2, -2] = -1
-        matrix[2, -3] = -1
-
-        matrix[-3, 0] = -1
-        matrix[-3, 1] = -1
-        matrix[-3, 2] = -1
-        matrix[-3, -1] = -1
-        matrix[-3, -2] = -1
-        matrix[-3, -3] = -1
+        Returns:
+            NDArray: The canonical form of every bitboard (uint64).
+        """
+        return self.geometry.CanonicalBatch(states, self.symmetries[1:])
 
-        return matrix
+    # Pack a game matrix into an integer (one bit per playable hole)
+    def MatrixToBitboard(self, game_board: NDArray) -> int:
+        """
+        Converts a game matrix into its packed bitboard representation.
 
-    # Create a 7x7 matrix to represent the goal state
-    def __initializeObjectiveMatrix(self):
+        Parameters:
+            game_board (NDArray): The game board matrix.
+
+        Returns:
+            int: The bitboard, bit i is set if the i-th playable hole has a piece.
         """
-        Initializes the objective matrix for the game.
-        The objective matrix represents the goal state of the game.
+        state = 0
+        for bit, (y, x) in enumerate(self.cell_coords):
+            if game_board[y, x] == 1:
+                state |= 1 << bit
+
+        return state
+
+    # Unpack a bitboard into a game matrix (only used at the edges, e.g. printing)
+    def BitboardToMatrix(self, state: int) -> NDArray:
         """
-        self.goalMatrix = np.zeros((self.GAME_SIZE, self.GAME_SIZE),dtype=object)
-        self.goalMatrix = self.__initializeMatrixCorners(self.goalMatrix)
-        # self.goalMatrix = self.__initializeMatrixCornersG(self.goalMatrix)
+        Converts a packed bitboard into a game matrix.
 
-        # Set the only piece in the center of the matrix
-        self.goalMatrix[self.CENTER_Y, self.CENTER_X] = 1
+        Parameters:
+            state (int): The bitboard.
+
+        Returns:
+            NDArray: The game board matrix (-1 outside the board, 0 empty, 1 piece).
+        """
+        game_board = np.full((self.GAME_SIZE, self.GAME_SIZE), -1, dtype=object)
+        for bit, (y, x) in enumerate(self.cell_coords):
+            game_board[y, x] = (state >> bit) & 1
+
+        return game_board
 
     # Print a more clean game board representation
     def PrintGame(self, game_board: NDArray, move_coord: list[tuple] = None):
         """
         Prints the current state of the game board.
         Args:
-            game_board (NDArray): The current state of the game board.
+            game_board (NDArray | int): The current state of the game board, as a matrix or a bitboard.
         """
-        temp_matrix = np.zeros((self.GAME_SIZE, self.GAME_SIZE), dtype=object)
-        temp_matrix = self.__initializeMatrixCorners(temp_matrix)
-
         if move_coord is not None:
             print(f"({move_coord[0][0]}, {move_coord[0][1]}) -> ({move_coord[1][0]}, {move_coord[1][1]})")
 
-        game_row_str = ""
-        for i in range(game_board.shape[0]):
-            for j in range(game_board.shape[1]):
-
-                if game_board[i, j] == -1:
-                    game_row_str += "  "
-                if game_board[i, j] == 1:
-                    game_row_str += " 1"
-                if game_board[i, j] == 0:
-                    game_row_str += " 0"
-            game_row_str += "\n"
+        if self.renderer is None:
+            self.renderer = BoardRenderer(self.geometry)
 
-        print(game_row_str)
+        state = game_board if isinstance(game_board, int) else self.MatrixToBitboard(game_board)
+        print(self.renderer.Render(state))
 
     # Get the piece coordinates in between two locations
     def GetPieceInBetween(self, x_from: int, y_from: int, x_to: int, y_to: int):
@@ -168,17 +201,21 @@ class PegSolitaire:
     def MakeMove(self, x_from: int, y_from: int, x_to: int, y_to: int, game_board: NDArray):
         """
         Makes a move on the board by moving a piece from one position to another.
+        The board can be either a game matrix or a packed bitboard (int).
 
         Parameters:
             x1 (int): The x-coordinate of the starting position.
             y1 (int): The y-coordinate of the starting position.
             x2 (int): The x-coordinate of the destination position.
             y2 (int): The y-coordinate of the destination position.
-            board (NDArray): The current state of the game board.
+            board (NDArray | int): The current state of the game board.
 
         Returns:
-            NDArray: The new state of the game board after the move, or None if the move is invalid.
+            NDArray | int: The new state of the game board after the move, or None if the move is invalid.
         """
+        if isinstance(game_board, int):
+            return self.__makeMoveBitboard(x_from, y_from, x_to, y_to, game_board)
+
         # Check if the to location is out of bounds
         if (x_to < 0 or x_to >= self.GAME_SIZE or
             y_to < 0 or y_to >= self.GAME_SIZE or
@@ -217,26 +254,42 @@ class PegSolitaire:
 
         return game_board
 
-    # Get all 4 possible next positions of a piece
-    def GetPiecePossibleNextPositions(self, x: int, y: int) -> list[tuple[int, int]] :
+    # Make a move on a packed bitboard
+    def __makeMoveBitboard(self, x_from: int, y_from: int, x_to: int, y_to: int, state: int):
         """
-        Gets the possible next positions for a piece at a given coordinate.
-        Looks for the possible moves in the up, down, right and left directions with a distance of 2.
-
-        Parameters:
-            x (int): The x-coordinate of the piece.
-            y (int): The y-coordinate of the piece.
+        Bitboard version of MakeMove, follows exactly the same rules.
 
         Returns:
-            list[tuple[int, int]]: A list of possible next positions.
-            Index of array 0: Up, 1: Down, 2: Right, 3: Left
+            int: The new bitboard after the move, or None if the move is invalid.
         """
-        up_location    = (y - 2, x)
-        down_location  = (y + 2, x)
-        right_location = (y, x + 2)
-        left_location  = (y, x - 2)
+        # Check if the to location is out of bounds
+        if (x_to < 0 or x_to >= self.GAME_SIZE or
+            y_to < 0 or y_to >= self.GAME_SIZE
+        ):
+            return None
 
-        return [ up_location, down_location, right_location, left_location ]
+        to_bit = self.cell_index[y_to][x_to]
+        from_bit = self.cell_index[y_from][x_from]
+        if to_bit < 0 or from_bit < 0:
+            return None
+
+        # The from coord must have a piece and the to coord must be empty
+        if not (state >> from_bit) & 1 or (state >> to_bit) & 1:
+            return None
+
+        diff_x = abs(x_from - x_to)
+        diff_y = abs(y_from - y_to)
+        if (diff_x != 0 and diff_x != 2) or (diff_y != 0 and diff_y != 2):
+            return None
+
+        # The piece in between must exist to be jumped
+        targetPiece = self.GetPieceInBetween(x_from, y_from, x_to, y_to)
+        target_bit = self.cell_index[ targetPiece[0] ][ targetPiece[1] ]
+        if target_bit < 0 or not (state >> target_bit) & 1:
+            return None
+
+        # Remove the from location, target piece and set the to location
+        return state ^ ((1 << from_bit) | (1 << target_bit) | (1 << to_bit))
 
     # Get the objective matrix
     def GetObjetiveMatrix(self):
@@ -256,11 +309,88 @@ class PegSolitaire:
         Returns:
             NDArray: The current state of the game board.
         """
-        game_matrix = np.ones((self.GAME_SIZE, self.GAME_SIZE), dtype=object)
-        game_matrix = self.__initializeMatrixCorners( game_matrix )
-        # game_matrix = self.__initializeMatrixCornersG( game_matrix )
+        if self.startState is not None:
+            return self.BitboardToMatrix(self.startState)
+
+        game_matrix = self.__createBoardMatrix(1)
 
         # Fill the matrix with 0 in the center
         game_matrix[self.CENTER_Y, self.CENTER_X] = 0
 
-        return game_matrix
\ No newline at end of file
+        return game_matrix
+
+    # Get the objective state as a bitboard
+    def GetObjetiveBitboard(self) -> int:
+        """
+        Gets the objective state for the game as a packed bitboard.
+
+        Returns:
+            int: The objective bitboard.
+        """
+        return self.MatrixToBitboard(self.goalMatrix)
+
+    # Get the initial game state as a bitboard
+    def GetGameBitboard(self) -> int:
+        """
+        Gets the initial state of the game board as a packed bitboard.
+
+        Returns:
+            int: The initial bitboard.
+        """
+        return self.MatrixToBitboard(self.GetGameMatrix())
+
+    # Set the start position (e.g. another vacancy or a mid-game position)
+    def SetGameBitboard(self, state: int) -> None:
+        """
+        Sets the initial state of the game board.
+
+        Parameters:
+            state (int): The initial bitboard, None to go back to the default start.
+        """
+        if state is not None and state & ~self.full_mask:
+            raise ValueError("The start position has pieces outside of the board")
+
+        self.startState = state
+
+    # Set the goal position (e.g. a peg in another hole or several pegs)
+    def SetObjetiveBitboard(self, goal: int) -> None:
+        """
+        Sets the objective state of the game. The symmetry group is rebuilt for the new goal.
+
+        Parameters:
+            goal (int): The objective bitboard.
+        """
+        if goal & ~self.full_mask:
+            raise ValueError("The goal position has pieces outside of the board")
+
+        self.goalMatrix = self.BitboardToMatrix(goal)
+        self.__initializeSymmetries()
+
+    # Get the legal jumps of many states at once
+    def GetLegalMovesBatch(self, states: NDArray) -> tuple[NDArray, NDArray]:
+        """
+        Finds the legal jumps of many bitboards at once, with array operations over the jump table
+        (boards of up to 64 holes).
+
+        Parameters:
+            states (NDArray): The bitboards (uint64).
+
+        Returns:
+            tuple[NDArray, NDArray]: For every legal jump, the index of its state and its index in the jump table.
+        """
+        if len(self.cell_coords) > 64:
+            raise ValueError("The batched move generation supports boards of up to 64 holes")
+
+        # A board without jumps has no legal moves
+        if len(self.jumps) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        parents = []
+        moves = []
+        for move, (need_mask, to_mask) in enumerate(zip(self.geometry.need_masks, self.geometry.to_masks)):
+            # The from and over holes must have a piece and the to hole must be empty
+            legal = np.flatnonzero(((states & need_mask) == need_mask) & ((states & to_mask) == 0))
+            parents.append(legal)
+            moves.append(np.full(len(legal), move, dtype=np.int64))
+
+        return np.concatenate(parents), np.concatenate(moves)
@@ -0,0 +1,265 @@
+import os
+import tempfile
+import warnings
+import zlib
+from contextlib import contextmanager
+import numpy as np
+from numpy.typing import NDArray
+from PegSolitaire import PegSolitaire
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: the lock of the saves is taken with msvcrt
+    fcntl = None
+    import msvcrt
+
+# Default maximum number of positions of a cache file (8 bytes each)
+DEFAULT_MAX_ENTRIES = 1 << 20
+
+class PositionCache:
+    """
+    Class implementing a persistent store of positions already proven dead or solvable for a board and a goal.
+    The positions are kept by their canonical bitboard (under the symmetries of the board that keep the goal),
+    so a rotated or mirrored copy of a known position is also known.
+
+    File format (little endian): a 48 bytes header (magic, version, board key, goal, number of dead
+    and solvable positions) followed by the two sorted uint64 arrays. The arrays are memory-mapped,
+    so opening the cache takes milliseconds and a lookup is a binary search. The saves of several processes
+    are serialized by a lock on the file path + ".lock", so none of them loses the positions of another one.
+
+    Attributes:
+        path (str): The file of the cache.
+        max_entries (int): Maximum number of positions kept in the file (DEFAULT_MAX_ENTRIES by default, None for
+            no limit, e.g. for a complete RetrogradeTable). When there are more, a warning is shown and the dead positions with the fewest pieces (the smallest subtrees) are evicted
+            first, then the solvable ones with the most pieces (the ones left still reach the goal through
+            solvable children, see AStar_Algorithm.__completeFromCache).
+        hits (int): Number of lookups that found the position.
+    """
+    MAGIC = b"PEGCACHE"
+    VERSION = 1
+    HEADER_DTYPE = np.dtype([ ("magic", "S8"), ("version", "<u8"), ("board", "<u8"), ("goal", "<u8"), ("dead", "<u8"), ("solvable", "<u8") ])
+
+    def __init__(self, path: str, game: PegSolitaire, goal: int, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        if len(game.cell_coords) > 64:
+            raise ValueError("The position cache supports boards of up to 64 holes")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("The position cache must keep at least one position")
+
+        self.path = path
+        self.game = game
+        self.goal = goal
+        self.max_entries = max_entries
+        self.hits = 0
+
+        # Key of the board: changes if the layout changes
+        self.board_key = zlib.crc32("\n".join(game.geometry.layout).encode())
+
+        # The symmetries that keep the goal (not restricted by any heuristic, so the keys are the same for every search)
+        geometry = game.geometry
+        self.__permutations = geometry.GoalSymmetries(goal)[1:]
+        self.__symmetryTables = [ geometry.GetSymmetryTables(permutation) for permutation in self.__permutations ]
+
+        self.__newDead: set[int] = set()
+        self.__newSolvable: set[int] = set()
+        # Arrays of canonical keys added at once (e.g. by RetrogradeTable), merged on the next save
+        self.__newArrays: list[tuple[NDArray, NDArray]] = []
+        self.__load()
+
+    def __load(self):
+        self.__dead = np.empty(0, dtype=np.uint64)
+        self.__solvable = np.empty(0, dtype=np.uint64)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < self.HEADER_DTYPE.itemsize:
+            return
+
+        # The header and the positions are read from one mapping, so they belong to the same file even if
+        # another process replaces it in between
+        mapping = np.memmap(self.path, dtype=np.uint8, mode="r")
+        header = mapping[:self.HEADER_DTYPE.itemsize].view(self.HEADER_DTYPE)[0]
+        if header["magic"] != self.MAGIC or header["version"] != self.VERSION or header["board"] != self.board_key or header["goal"] != self.goal:
+            # The file belongs to another board or goal: it is replaced on the next save
+            return
+
+        dead_count = int(header["dead"])
+        solvable_count = int(header["solvable"])
+        if dead_count + solvable_count == 0 or len(mapping) < self.HEADER_DTYPE.itemsize + 8 * (dead_count + solvable_count):
+            return
+
+        positions = mapping[self.HEADER_DTYPE.itemsize:self.HEADER_DTYPE.itemsize + 8 * (dead_count + solvable_count)].view("<u8")
+        self.__dead = positions[:dead_count]
+        self.__solvable = positions[dead_count:]
+
+    def CanonicalKey(self, state: int) -> int:
+        """
+        Gets the key of a position: the smallest bitboard among its symmetric copies.
+
+        Parameters:
+            state (int): The bitboard.
+
+        Returns:
+            int: The key of the position.
+        """
+        return self.game.geometry.Canonical(state, self.__symmetryTables)
+
+    def CanonicalKeys(self, states: NDArray) -> NDArray:
+        """
+        Vectorized CanonicalKey for many positions at once.
+
+        Parameters:
+            states (NDArray): The bitboards (uint64).
+
+        Returns:
+            NDArray: The key of every position (uint64).
+        """
+        return self.game.geometry.CanonicalBatch(states, self.__permutations)
+
+    def __contains(self, stored: NDArray, keys: NDArray) -> NDArray:
+        if len(stored) == 0:
+            return np.zeros(len(keys), dtype=bool)
+
+        positions = np.searchsorted(stored, keys)
+        return stored[np.minimum(positions, len(stored) - 1)] == keys
+
+    def LookupBatch(self, states: list[int]) -> tuple[list[bool], list[bool]]:
+        """
+        Looks up several positions at once.
+
+        Parameters:
+            states (list[int]): The bitboards.
+
+        Returns:
+            tuple[list[bool], list[bool]]: For every position, if it is known to be dead and if it is known to be solvable.
+        """
+        keys = [ self.CanonicalKey(state) for state in states ]
+        if len(self.__dead) + len(self.__solvable) > 0:
+            key_array = np.array(keys, dtype=np.uint64)
+            dead = self.__contains(self.__dead, key_array).tolist()
+            solvable = self.__contains(self.__solvable, key_array).tolist()
+        else:
+            # Nothing on disk yet: only the positions of this run
+            dead = [False] * len(keys)
+            solvable = [False] * len(keys)
+
+        for index, key in enumerate(keys):
+            dead[index] = dead[index] or key in self.__newDead
+            solvable[index] = solvable[index] or key in self.__newSolvable
+
+        self.hits += sum(dead) + sum(solvable)
+        return dead, solvable
+
+    def IsDead(self, state: int) -> bool:
+        """
+        Checks if a position is known to be dead (the goal can not be reached from it).
+        """
+        return self.LookupBatch([state])[0][0]
+
+    def IsSolvable(self, state: int) -> bool:
+        """
+        Checks if a position is known to be solvable (the goal can be reached from it).
+        """
+        return self.LookupBatch([state])[1][0]
+
+    def AddDead(self, state: int) -> None:
+        """
+        Stores a position proven to be dead.
+        """
+        self.__newDead.add(self.CanonicalKey(state))
+
+    def AddSolvable(self, state: int) -> None:
+        """
+        Stores a position proven to be solvable.
+        """
+        self.__newSolvable.add(self.CanonicalKey(state))
+
+    def AddArrays(self, dead: NDArray, solvable: NDArray) -> None:
+        """
+        Stores many positions proven dead or solvable at once.
+
+        Parameters:
+            dead (NDArray): Bitboards of dead positions (uint64).
+            solvable (NDArray): Bitboards of solvable positions (uint64).
+        """
+        self.__newArrays.append((self.CanonicalKeys(dead), self.CanonicalKeys(solvable)))
+
+    def __evict(self, positions: NDArray, count: int, keep_most_pieces: bool) -> NDArray:
+        # Dead positions: keep the ones with the most pieces, they prune the biggest subtrees.
+        # Solvable positions: keep the ones with the fewest pieces, so every chain of solvable positions
+        # down to the goal is cut from the top and a kept position still has a kept solvable child
+        if len(positions) <= count:
+            return positions
+
+        warnings.warn(f"The position cache {self.path} keeps {count} of {len(positions)} positions (max_entries={self.max_entries})")
+        pieces = np.unpackbits(positions.astype("<u8").view(np.uint8)).reshape(-1, 64).sum(axis=1)
+        keep = np.argsort(-pieces if keep_most_pieces else pieces, kind="stable")[:count]
+        return np.sort(positions[keep])
+
+    @contextmanager
+    def __lock(self):
+        # Exclusive lock of the saves of this cache among processes, released by the system if the process ends
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".lock", "a+b") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def Save(self) -> None:
+        """
+        Merges the new positions with the ones of the file and writes the file (atomically).
+        The file is read again first under the lock of the cache, so the positions saved meanwhile by other
+        processes are kept. The file is not written when every new position was already in it.
+        """
+        with self.__lock():
+            self.__save()
+
+    def __save(self) -> None:
+        self.__load()
+        if self.__newSolvable:
+            keys = np.fromiter(self.__newSolvable, dtype=np.uint64, count=len(self.__newSolvable))
+            self.__newSolvable.difference_update(keys[self.__contains(self.__solvable, keys)].tolist())
+        if self.__newDead:
+            keys = np.fromiter(self.__newDead, dtype=np.uint64, count=len(self.__newDead))
+            self.__newDead.difference_update(keys[self.__contains(self.__dead, keys)].tolist())
+
+        if not self.__newDead and not self.__newSolvable and not self.__newArrays:
+            return
+
+        solvable = np.concatenate([ np.asarray(self.__solvable), np.fromiter(self.__newSolvable, dtype=np.uint64, count=len(self.__newSolvable)) ] + [ arrays[1] for arrays in self.__newArrays ])
+        dead = np.concatenate([ np.asarray(self.__dead), np.fromiter(self.__newDead, dtype=np.uint64, count=len(self.__newDead)) ] + [ arrays[0] for arrays in self.__newArrays ])
+        solvable = np.unique(solvable)
+        dead = np.unique(dead)
+
+        # Bounded size: the solvable positions are kept first
+        if self.max_entries is not None:
+            solvable = self.__evict(solvable, self.max_entries, False)
+            dead = self.__evict(dead, self.max_entries - len(solvable), True)
+
+        # Release the memory-mapped arrays before replacing the file
+        self.__dead = self.__solvable = None
+
+        header = np.zeros(1, dtype=self.HEADER_DTYPE)
+        header[0] = (self.MAGIC, self.VERSION, self.board_key, self.goal, len(dead), len(solvable))
+
+        # A temporary file, so the processes that only read the cache never see a partial file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=directory)
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(header.tobytes())
+            file.write(dead.astype("<u8").tobytes())
+            file.write(solvable.astype("<u8").tobytes())
+        os.replace(temp_path, self.path)
+
+        self.__newDead.clear()
+        self.__newSolvable.clear()
+        self.__newArrays.clear()
+        self.__load()
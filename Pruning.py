@@ -0,0 +1,231 @@
+import numpy as np
+from numpy.typing import NDArray
+from PegSolitaire import PegSolitaire
+
+# Number of pieces of every byte, for NumPy versions without np.bitwise_count (added in NumPy 2.0)
+_BYTE_POPCOUNT = np.array([ bin(byte).count("1") for byte in range(256) ], dtype=np.uint8)
+
+def _popcount(states: NDArray) -> NDArray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(states)
+
+    counts = np.zeros(len(states), dtype=np.uint8)
+    for chunk in range(8):
+        counts += _BYTE_POPCOUNT[(states >> np.uint64(8 * chunk)) & np.uint64(0xFF)]
+    return counts
+
+class PositionPruning:
+    """
+    Class rejecting positions that can never reach the goal.
+    Every rule is admissible (it never rejects a position that can still be solved) and
+    everything is precomputed from the board geometry and the goal.
+
+    Rules:
+        Pagoda functions: weights of the holes such that w(from) + w(over) >= w(to) for every jump,
+            so the total weight of the pieces can never grow. A position with less weight than
+            the goal is dead. Two families are used: a Fibonacci pagoda centered in the board and
+            the 4 parity lattices (holes with the same x and y parity).
+        Position class: the parity of the pieces in the diagonal classes (x + y and x - y mod 3)
+            never changes, so it is checked once between the start and the goal.
+        Isolated pieces: if no piece has another piece next to it, no move is possible anymore.
+
+    Attributes:
+        goal (int): The goal bitboard.
+        pruned (int): Number of positions rejected so far.
+    """
+
+    def __init__(self, game: PegSolitaire, goal: int) -> None:
+        self.game = game
+        self.goal = goal
+        self.goal_pieces = goal.bit_count()
+        self.pruned = 0
+
+        self.__initializePagodas()
+        self.__initializePositionClasses()
+        self.__initializeAdjacency()
+
+    # Weights of every pagoda function, its lookup tables and the weight of the goal
+    def __initializePagodas(self):
+        cell_count = len(self.game.cell_coords)
+        pagodas = []
+
+        # Fibonacci pagoda: moving towards the center, w(from) + w(over) == w(to) (F(n-2) + F(n-1) = F(n))
+        distances = [ abs(self.game.CENTER_Y - y) + abs(self.game.CENTER_X - x) for (y, x) in self.game.cell_coords ]
+        fibonacci = [0, 1]
+        while len(fibonacci) <= max(distances) + 1:
+            fibonacci.append(fibonacci[-1] + fibonacci[-2])
+        pagodas.append([ fibonacci[max(distances) + 1 - distance] for distance in distances ])
+
+        # Parity lattices: a piece can only land in a lattice hole coming from another hole of the same lattice
+        for parity_x in (0, 1):
+            for parity_y in (0, 1):
+                pagodas.append([ int(x % 2 == parity_x and y % 2 == parity_y) for (y, x) in self.game.cell_coords ])
+
+        self.pagodas: list[tuple[list[list[int]], list[int], int]] = []
+        for weights in pagodas:
+            goal_weight = self.__weight(self.goal, weights)
+            if goal_weight == 0:
+                # Every position has at least the weight of the goal, the pagoda can not reject anything
+                continue
+
+            # Change of the weight made by every jump of the jump table
+            deltas = [ weights[jump.to_bit] - weights[jump.from_bit] - weights[jump.over_bit] for jump in self.game.jumps ]
+
+            tables = []
+            for chunk_start in range(0, cell_count, 8):
+                tables.append([ self.__weight(byte << chunk_start, weights) for byte in range(256) ])
+
+            self.pagodas.append((tables, deltas, goal_weight))
+
+        # The same tables as arrays, for DeadMask
+        self.pagoda_arrays: list[tuple[NDArray, int]] = [ (np.array(tables, dtype=np.int64), goal_weight) for tables, _, goal_weight in self.pagodas ]
+
+    def __weight(self, state: int, weights: list[int]) -> int:
+        return sum(weight for bit, weight in enumerate(weights) if (state >> bit) & 1)
+
+    def __tableWeight(self, state: int, tables: list[list[int]]) -> int:
+        total = 0
+        for table in tables:
+            total += table[state & 0xFF]
+            state >>= 8
+        return total
+
+    # Masks of the 3 classes of each diagonal direction
+    def __initializePositionClasses(self):
+        self.position_classes: list[list[int]] = [ [0, 0, 0], [0, 0, 0] ]
+        for bit, (y, x) in enumerate(self.game.cell_coords):
+            self.position_classes[0][(x + y) % 3] |= 1 << bit
+            self.position_classes[1][(x - y) % 3] |= 1 << bit
+
+    # Masks to find two pieces next to each other
+    def __initializeAdjacency(self):
+        self.adjacent_pairs: list[int] = []
+        for bit, (y, x) in enumerate(self.game.cell_coords):
+            for dx, dy in ((1, 0), (0, 1)):
+                if x + dx < self.game.GAME_SIZE and y + dy < self.game.GAME_SIZE and self.game.cell_index[y + dy][x + dx] >= 0:
+                    self.adjacent_pairs.append((1 << bit) | (1 << self.game.cell_index[y + dy][x + dx]))
+
+    def GetPositionClass(self, state: int) -> tuple[int, ...]:
+        """
+        Gets the position class of a bitboard. A jump changes the number of pieces of every
+        diagonal class by one, so the parities below are the same for all the reachable positions.
+
+        Parameters:
+            state (int): The bitboard.
+
+        Returns:
+            tuple[int, ...]: The parity of the pieces in every pair of classes.
+        """
+        result = []
+        for classes in self.position_classes:
+            counts = [ (state & mask).bit_count() for mask in classes ]
+            result.append((counts[0] + counts[1]) & 1)
+            result.append((counts[1] + counts[2]) & 1)
+
+        return tuple(result)
+
+    def IsSolvable(self, start: int) -> bool:
+        """
+        Checks (without searching) if the goal can be reached from a start position.
+        A False answer is a proof, True only means that no rule rejects the start.
+
+        Parameters:
+            start (int): The start bitboard.
+
+        Returns:
+            bool: False if the start can never reach the goal.
+        """
+        if start == self.goal:
+            return True
+
+        if self.GetPositionClass(start) != self.GetPositionClass(self.goal):
+            return False
+
+        return not self.IsDead(start)
+
+    def IsDead(self, state: int) -> bool:
+        """
+        Checks if a position can never reach the goal.
+
+        Parameters:
+            state (int): The bitboard.
+
+        Returns:
+            bool: True if the position is dead.
+        """
+        if state == self.goal:
+            return False
+
+        pieces = state.bit_count()
+        if pieces <= self.goal_pieces or not self.__hasAdjacentPieces(state):
+            return True
+
+        for tables, _, goal_weight in self.pagodas:
+            if self.__tableWeight(state, tables) < goal_weight:
+                return True
+
+        return False
+
+    def DeadMask(self, states: NDArray) -> NDArray:
+        """
+        Vectorized IsDead for many positions at once (boards of up to 64 holes).
+
+        Parameters:
+            states (NDArray): The bitboards (uint64).
+
+        Returns:
+            NDArray: True for every dead position.
+        """
+        dead = _popcount(states) <= self.goal_pieces
+
+        adjacent = np.zeros(len(states), dtype=bool)
+        for pair in self.adjacent_pairs:
+            adjacent |= (states & np.uint64(pair)) == np.uint64(pair)
+        dead |= ~adjacent
+
+        for tables, goal_weight in self.pagoda_arrays:
+            weight = np.zeros(len(states), dtype=np.int64)
+            for chunk, table in enumerate(tables):
+                weight += table[(states >> np.uint64(8 * chunk)) & np.uint64(0xFF)]
+            dead |= weight < goal_weight
+
+        return dead & (states != np.uint64(self.goal))
+
+    def __hasAdjacentPieces(self, state: int) -> bool:
+        for pair in self.adjacent_pairs:
+            if (state & pair) == pair:
+                return True
+        return False
+
+    def FilterMoves(self, state: int, moves: list[int]) -> list[int]:
+        """
+        Removes the moves that lead to a dead position.
+
+        Parameters:
+            state (int): The bitboard of the parent (must not be dead).
+            moves (list[int]): Index in the jump table of every legal jump.
+
+        Returns:
+            list[int]: The moves whose child is not dead.
+        """
+        jumps = self.game.jumps
+        child_pieces = state.bit_count() - 1
+
+        # The weight of the children is the weight of the parent plus the change of the jump
+        parent_weights = [ (self.__tableWeight(state, tables), deltas, goal_weight) for tables, deltas, goal_weight in self.pagodas ]
+
+        result = []
+        for move in moves:
+            child = state ^ jumps[move].move_mask
+            if child != self.goal:
+                if child_pieces <= self.goal_pieces:
+                    continue
+                if any(weight + deltas[move] < goal_weight for weight, deltas, goal_weight in parent_weights):
+                    continue
+                if not self.__hasAdjacentPieces(child):
+                    continue
+
+            result.append(move)
+
+        self.pruned += len(moves) - len(result)
+        return result
@@ -0,0 +1,478 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import numpy as np
+from PegSolitaire import PegSolitaire
+from PositionCache import PositionCache
+from Solvers import CreateSolver, RunSolver
+
+# Performance regression suite: solves a fixed corpus of positions on every board geometry, checks every
+# solution move by move and compares the time, nodes and memory with a stored baseline
+
+# Every case: engine, arguments of its class, start and goal (None for the default of the board, or the
+# name of the single hole that is empty at the start / that keeps the last piece; the start can also be
+# the list of the empty holes of a mid-game position) and search arguments.
+# The node budgets keep the unsolved cases deterministic, so their nodes are compared too. HDA* runs with a
+# single worker, with more of them the expanded nodes depend on the timing of the processes. The external
+# search enumerates every layer, so it starts from a mid-game position with a small memory limit (it spills).
+CORPUS = [
+    { "name": "english-astar", "engine": "astar", "options": { "board": "english", "heuristic": "manhattan" }, "start": None, "goal": None, "search": {} },
+    { "name": "english-idastar", "engine": "idastar", "options": { "board": "english", "heuristic": "manhattan" }, "start": None, "goal": None, "search": {} },
+    { "name": "english-dfs", "engine": "dfs", "options": { "board": "english", "heuristic": "combined" }, "start": None, "goal": None, "search": {} },
+    { "name": "english-e7-dfs", "engine": "dfs", "options": { "board": "english", "heuristic": "combined" }, "start": "e7", "goal": "e7", "search": {} },
+    { "name": "english-anytime", "engine": "anytime", "options": { "board": "english", "heuristic": "manhattan" }, "start": None, "goal": None, "search": {} },
+    { "name": "english-bidirectional", "engine": "bidirectional", "options": { "board": "english", "heuristic": "manhattan" }, "start": None, "goal": None, "search": {} },
+    { "name": "english-hdastar", "engine": "hdastar", "options": { "board": "english", "heuristic": "manhattan", "workers": 1 }, "start": None, "goal": None, "search": {} },
+    { "name": "english-midgame-external", "engine": "external", "options": { "board": "english", "heuristic": "manhattan", "memory_limit": 1 << 20 }, "start": [ "c1", "d1", "e1", "c2", "d2", "b4", "b5", "c6", "d6", "e6", "c7" ], "goal": None, "search": {} },
+    { "name": "english-beam", "engine": "beam", "options": { "board": "english", "heuristic": "combined" }, "start": None, "goal": None, "search": { "beam_width": 1000 } },
+    { "name": "european-c1-e7-dfs", "engine": "dfs", "options": { "board": "european", "heuristic": "combined" }, "start": "c1", "goal": "e7", "search": {} },
+    { "name": "square-d4-dfs", "engine": "dfs", "options": { "board": "square", "heuristic": "combined" }, "start": "d4", "goal": "d4", "search": {} },
+    { "name": "german-astar-budget", "engine": "astar", "options": { "board": "german", "heuristic": "combined" }, "start": None, "goal": None, "search": { "max_nodes": 20000 } },
+]
+
+DEFAULT_BASELINE = "regression_baseline.json"
+
+# Mid-game check: the positions along the solutions of the DFS cases of the corpus are solvable, so every
+# complete engine must solve them too. Most of them are asymmetric, unlike the starts of the corpus. Only a
+# few positions near the end of every solution are checked (few pieces), every run with a budget.
+MIDGAME_ENGINES = {
+    "astar": {},
+    "bidirectional": { "max_backward_states": 2000 },
+}
+MIDGAME_STEP = 4
+MIDGAME_POSITIONS = 3
+MIDGAME_BUDGET = { "max_nodes": 200000, "max_time": 30 }
+
+# Parallel check: HDA* with several workers expands out of the order of A* (some more nodes) but without waiting
+# for each other, so both its expanded nodes and its time must stay within a small factor of A* (the time also
+# holds the start of the processes, and all of them share the CPU on a machine with a single one). A mid-game
+# position keeps it short.
+PARALLEL_CASE = { "name": "english-midgame-parallel", "options": { "board": "english", "heuristic": "manhattan", "use_symmetry": True }, "start": [ "c1", "d1", "e1", "c2", "d2", "b4", "c4", "b5", "c5", "d6", "e6", "d7", "e7" ], "goal": None }
+PARALLEL_WORKERS = 3
+PARALLEL_FACTOR = 4
+PARALLEL_TIME_FACTOR = 10
+PARALLEL_MAX_TIME = 120
+
+# Seconds the cold run of an external case of CheckMemoryLimit can take
+MEMORY_MAX_TIME = 120
+
+# Anytime check: a budget too small for the greediest run must still leave a slice to the lower weights
+ANYTIME_CASE = { "name": "german-anytime-restarts", "engine": "anytime", "options": { "board": "german", "heuristic": "manhattan" }, "start": None, "goal": None, "search": { "max_nodes": 20000 } }
+
+# Position cache: a cache capped at CACHE_MAX_ENTRIES gets CACHE_POSITIONS solvable and dead positions, and
+# CACHE_WORKERS processes save CACHE_POSITIONS dead positions each to one cache, CACHE_SAVES times
+CACHE_BOARD = "english"
+CACHE_MAX_ENTRIES = 64
+CACHE_POSITIONS = 200
+CACHE_WORKERS = 3
+CACHE_SAVES = 10
+
+def _holeBit(game: PegSolitaire, hole: str) -> int:
+    # Hole in the standard notation (see Rendering.HoleName), e.g. "d4"
+    x, y = ord(hole[0]) - ord('a'), int(hole[1:]) - 1
+    if not (0 <= x < game.GAME_SIZE and 0 <= y < game.GAME_SIZE) or game.cell_index[y][x] < 0:
+        raise ValueError(f"The hole '{hole}' is not on the board")
+    return game.cell_index[y][x]
+
+def _createSolver(case: dict):
+    solver = CreateSolver(case["engine"], **case["options"])
+    if case["start"] is not None:
+        empty = [ case["start"] ] if isinstance(case["start"], str) else case["start"]
+        solver.SetGameBitboard(solver.full_mask & ~sum(1 << _holeBit(solver, hole) for hole in empty))
+    if case["goal"] is not None:
+        solver.SetObjetiveBitboard(1 << _holeBit(solver, case["goal"]))
+    return solver
+
+def IsValidSolution(solver) -> bool:
+    """
+    Checks the last solution of a solver by replaying every move with PegSolitaire.MakeMove on a
+    new game matrix: every move must be legal and the last board must be the goal.
+    """
+    if solver.solution is None:
+        return False
+
+    game = PegSolitaire(solver.geometry.layout, (solver.CENTER_X, solver.CENTER_Y))
+    game.SetGameBitboard(solver.GetGameBitboard())
+    game_board = game.GetGameMatrix()
+    for jump in solver.solution:
+        game_board = game.MakeMove(*jump.from_coord, *jump.to_coord, game_board)
+        if game_board is None:
+            return False
+
+    return game.MatrixToBitboard(game_board) == solver.GetObjetiveBitboard()
+
+def CheckMidgamePositions(cases: list[dict] = None, engines: dict = None, step: int = MIDGAME_STEP, count: int = MIDGAME_POSITIONS, budget: dict = MIDGAME_BUDGET) -> tuple[list[str], list[str]]:
+    """
+    Solves the DFS cases of the corpus and starts every engine from the last positions of their solutions
+    (one every step moves back from the goal). Every position is solvable, so each engine must find a valid
+    solution or spend its budget.
+
+    Parameters:
+        cases (list[dict]): The cases (see CORPUS), only the "dfs" ones are used.
+        engines (dict): Arguments of the class of every engine (see MIDGAME_ENGINES).
+        step (int): Number of moves between two checked positions.
+        count (int): Number of checked positions of every solution.
+        budget (dict): Arguments of the search of every run (max_nodes, max_time).
+
+    Returns:
+        tuple[list[str], list[str]]: One line for every wrong answer (no solution found without spending the budget,
+            or an invalid one), and one line for every run stopped by its budget.
+    """
+    failures = []
+    exhausted = []
+    for case in cases or CORPUS:
+        if case["engine"] != "dfs":
+            continue
+
+        solver = _createSolver(case)
+        RunSolver(solver, False, **case["search"])
+        if solver.solution is None:
+            failures.append(f"{case['name']}: sin solución para las posiciones intermedias")
+            continue
+
+        state = solver.GetGameBitboard()
+        states = []
+        for jump in solver.solution[:-1]:
+            state ^= jump.move_mask
+            states.append(state)
+
+        # The positions step, 2 * step... moves before the goal
+        positions = [ states[-index] for index in range(step, len(states) + 1, step) ][:count]
+
+        for engine, options in (engines or MIDGAME_ENGINES).items():
+            for position in positions:
+                midgame = CreateSolver(engine, **{ **case["options"], "heuristic": "manhattan", **options })
+                midgame.SetGameBitboard(position)
+                midgame.SetObjetiveBitboard(solver.GetObjetiveBitboard())
+                stats = RunSolver(midgame, False, **budget)
+                if stats.solved and IsValidSolution(midgame):
+                    continue
+                if not stats.solved and stats.budget_exhausted:
+                    exhausted.append(f"{case['name']}: {engine} no resuelve la posición {position:#x} dentro del presupuesto")
+                else:
+                    failures.append(f"{case['name']}: {engine} no resuelve la posición {position:#x}")
+
+    return failures, exhausted
+
+def CheckParallelExpansions(case: dict = PARALLEL_CASE, workers: int = PARALLEL_WORKERS, factor: float = PARALLEL_FACTOR, time_factor: float = PARALLEL_TIME_FACTOR) -> list[str]:
+    """
+    Solves a case with A* and with HDA* on several workers (same options), and checks that HDA* finds
+    a valid solution expanding at most factor times the nodes of A* in at most time_factor times its time.
+
+    Parameters:
+        case (dict): The case (see PARALLEL_CASE), its options are the ones of both engines.
+        workers (int): Number of worker processes of HDA*.
+        factor (float): Accepted ratio between the expanded nodes of HDA* and of A*.
+        time_factor (float): Accepted ratio between the time of HDA* and of A*.
+
+    Returns:
+        list[str]: One line for every failed check (empty if there is none).
+    """
+    reference = RunSolver(_createSolver({ **case, "engine": "astar" }), False)
+    solver = _createSolver({ **case, "engine": "hdastar", "options": { **case["options"], "workers": workers } })
+    stats = RunSolver(solver, False, max_time=PARALLEL_MAX_TIME)
+
+    if stats.budget_exhausted:
+        return [ f"{case['name']}: HDA* no terminó en {PARALLEL_MAX_TIME} s ({stats.expanded_nodes} nodos, A* {reference.expanded_nodes})" ]
+    if stats.solved != reference.solved or (stats.solved and not IsValidSolution(solver)):
+        return [ f"{case['name']}: HDA* no encuentra una solución válida" ]
+
+    failures = []
+    if stats.expanded_nodes > factor * reference.expanded_nodes:
+        failures.append(f"{case['name']}: HDA* expande {stats.expanded_nodes} nodos con {workers} procesos (A* {reference.expanded_nodes})")
+    if stats.elapsed_time > time_factor * reference.elapsed_time:
+        failures.append(f"{case['name']}: HDA* tarda {stats.elapsed_time:.2f} s con {workers} procesos (A* {reference.elapsed_time:.2f} s)")
+    return failures
+
+def _coldPeakMemory(case: dict, results) -> None:
+    # Worker of CheckMemoryLimit: peak memory of the first search of a new process (the solver is built before)
+    solver = _createSolver(case)
+    tracemalloc.start()
+    try:
+        RunSolver(solver, False, **case["search"])
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    results.put((peak_memory, solver.memory_limit))
+
+def CheckMemoryLimit(cases: list[dict] = None) -> list[str]:
+    """
+    Checks that the external memory cases keep the arrays of the search within their memory_limit. The search
+    is measured cold, as the first one of a new process (the tables of the solver are built before the
+    measure, the imports of the first search are included).
+
+    Parameters:
+        cases (list[dict]): The cases (see CORPUS), only the ones of the external engine are checked.
+
+    Returns:
+        list[str]: One line for every case above its limit (empty if there is none).
+    """
+    failures = []
+    context = multiprocessing.get_context("spawn")
+    for case in cases or CORPUS:
+        if case["engine"] != "external":
+            continue
+
+        results = context.Queue()
+        process = context.Process(target=_coldPeakMemory, args=(case, results))
+        process.start()
+        try:
+            peak_memory, memory_limit = results.get(timeout=MEMORY_MAX_TIME)
+        except queue.Empty:
+            process.terminate()
+            failures.append(f"{case['name']}: la búsqueda no termina en {MEMORY_MAX_TIME} s")
+            continue
+        finally:
+            process.join()
+
+        if peak_memory > memory_limit:
+            failures.append(f"{case['name']}: la búsqueda usa {peak_memory} bytes (límite {memory_limit} bytes)")
+
+    return failures
+
+def CheckAnytimeRestarts(case: dict = ANYTIME_CASE) -> list[str]:
+    """
+    Runs the anytime search of a case whose budget ends before a solution is found, and checks that
+    every weight got a slice of the budget and that the budget was respected.
+
+    Parameters:
+        case (dict): The case (see ANYTIME_CASE), its search must have a budget.
+
+    Returns:
+        list[str]: One line for every failed check (empty if there is none).
+    """
+    solver = _createSolver(case)
+    stats = RunSolver(solver, False, **case["search"])
+    weights = solver.anytimeWeights
+
+    failures = []
+    if not stats.solved and len(weights) < 2:
+        failures.append(f"{case['name']}: solo se ejecutan los pesos {weights}")
+    if "max_nodes" in case["search"] and stats.expanded_nodes > case["search"]["max_nodes"]:
+        failures.append(f"{case['name']}: {stats.expanded_nodes} nodos expandidos (presupuesto {case['search']['max_nodes']})")
+    if solver.bestPath is None or stats.best_pieces is None:
+        failures.append(f"{case['name']}: sin la mejor posición alcanzada")
+    return failures
+
+def _cachePositions(cache: PositionCache, count: int, seed: int) -> list[int]:
+    # Random positions of the board with different canonical keys
+    game = cache.game
+    generator = np.random.default_rng(seed)
+    keys = {}
+    while len(keys) < count:
+        state = int(generator.integers(1, game.full_mask, endpoint=True)) & game.full_mask
+        keys.setdefault(cache.CanonicalKey(state), state)
+    return list(keys.values())
+
+def _saveCachePositions(path: str, states: list[int], saves: int) -> None:
+    # Worker of CheckPositionCache: saves its dead positions in several steps
+    game = PegSolitaire(CACHE_BOARD)
+    cache = PositionCache(path, game, game.GetObjetiveBitboard(), max_entries=None)
+    step = -(-len(states) // saves)
+    for start in range(0, len(states), step):
+        for state in states[start:start + step]:
+            cache.AddDead(state)
+        cache.Save()
+
+def CheckPositionCache(max_entries: int = CACHE_MAX_ENTRIES, count: int = CACHE_POSITIONS, workers: int = CACHE_WORKERS, saves: int = CACHE_SAVES) -> list[str]:
+    """
+    Fills a position cache past its max_entries and checks that the positions are evicted (the solvable ones with
+    the fewest pieces are kept), then saves positions to one cache from several processes at once and checks that
+    none of them is lost.
+
+    Parameters:
+        max_entries (int): Maximum number of positions of the first cache.
+        count (int): Number of positions of every kind / of every process.
+        workers (int): Number of processes saving at once.
+        saves (int): Number of saves of every process.
+
+    Returns:
+        list[str]: One line for every failed check (empty if there is none).
+    """
+    failures = []
+    game = PegSolitaire(CACHE_BOARD)
+    goal = game.GetObjetiveBitboard()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "evict.cache")
+        cache = PositionCache(path, game, goal, max_entries)
+        states = _cachePositions(cache, 2 * count, 0)
+        solvable, dead = states[:count], states[count:]
+        for state in solvable:
+            cache.AddSolvable(state)
+        for state in dead:
+            cache.AddDead(state)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            cache.Save()
+
+        cache = PositionCache(path, game, goal, None)
+        known_solvable = [ state for state, known in zip(solvable, cache.LookupBatch(solvable)[1]) if known ]
+        known_dead = sum(cache.LookupBatch(dead)[0])
+        if len(known_solvable) + known_dead > max_entries:
+            failures.append(f"position-cache: {len(known_solvable) + known_dead} posiciones guardadas (max_entries {max_entries})")
+        if not caught:
+            failures.append("position-cache: la expulsión de posiciones no muestra ningún aviso")
+        pieces = lambda state: bin(state).count("1")
+        evicted = [ pieces(state) for state in solvable if state not in known_solvable ]
+        if known_solvable and evicted and max(map(pieces, known_solvable)) > min(evicted):
+            failures.append("position-cache: se expulsan posiciones resolubles con menos piezas que las guardadas")
+
+        path = os.path.join(directory, "shared.cache")
+        cache = PositionCache(path, game, goal, None)
+        states = _cachePositions(cache, workers * count, 1)
+        context = multiprocessing.get_context()
+        processes = [ context.Process(target=_saveCachePositions, args=(path, states[index::workers], saves)) for index in range(workers) ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        cache = PositionCache(path, game, goal, None)
+        lost = len(states) - sum(cache.LookupBatch(states)[0])
+        if lost or any(process.exitcode != 0 for process in processes):
+            failures.append(f"position-cache: {workers} procesos guardando a la vez pierden {lost} de {len(states)} posiciones")
+    return failures
+
+def RunCase(case: dict, repetitions: int = 3, measure_memory: bool = True) -> dict:
+    """
+    Solves one case of the corpus several times.
+
+    Parameters:
+        case (dict): The case (see CORPUS).
+        repetitions (int): Number of timed runs, the fastest one is kept.
+        measure_memory (bool): Measure the peak memory with tracemalloc (one extra untimed run).
+
+    Returns:
+        dict: The time, expanded nodes, peak memory, and if the case was solved with a valid solution.
+    """
+    if repetitions < 1:
+        raise ValueError("The number of repetitions must be at least 1")
+
+    peak_memory = None
+    if measure_memory:
+        # Also the warm up of the timed runs
+        tracemalloc.start()
+        try:
+            RunSolver(_createSolver(case), False, **case["search"])
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    times = []
+    for _ in range(repetitions):
+        solver = _createSolver(case)
+        start_time = time.perf_counter()
+        stats = RunSolver(solver, False, **case["search"])
+        times.append(time.perf_counter() - start_time)
+
+    return {
+        "execution_time": min(times),
+        "expanded_nodes": stats.expanded_nodes,
+        "peak_memory_bytes": peak_memory,
+        "solved": stats.solved,
+        "valid": IsValidSolution(solver) if stats.solved else None,
+    }
+
+def RunSuite(cases: list[dict] = None, repetitions: int = 3, measure_memory: bool = True) -> dict:
+    """
+    Runs every case of the corpus.
+
+    Returns:
+        dict: The Python version, the machine and the result of every case by its name.
+    """
+    results = {}
+    for case in cases or CORPUS:
+        results[case["name"]] = RunCase(case, repetitions, measure_memory)
+        PrintCase(case["name"], results[case["name"]])
+
+    return { "python": platform.python_version(), "machine": platform.machine(), "cases": results }
+
+def Compare(result: dict, baseline: dict, time_tolerance: float = 0.3, nodes_tolerance: float = 0.0, memory_tolerance: float = 0.2) -> list[str]:
+    """
+    Compares the result of the suite with a baseline. The tolerances are relative increases,
+    e.g. 0.3 accepts a time up to 30% above the one of the baseline.
+
+    Returns:
+        list[str]: One line for every regression (empty if there is none).
+    """
+    regressions = []
+    for name, case in result["cases"].items():
+        if case["valid"] is False:
+            regressions.append(f"{name}: solución inválida")
+
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+
+        if base["solved"] and not case["solved"]:
+            regressions.append(f"{name}: ya no se resuelve")
+        if case["expanded_nodes"] > base["expanded_nodes"] * (1 + nodes_tolerance):
+            regressions.append(f"{name}: nodos expandidos {case['expanded_nodes']} (línea base {base['expanded_nodes']})")
+        if case["execution_time"] > base["execution_time"] * (1 + time_tolerance):
+            regressions.append(f"{name}: tiempo {case['execution_time']:.4f} s (línea base {base['execution_time']:.4f} s)")
+        if case["peak_memory_bytes"] is not None and base["peak_memory_bytes"] is not None and case["peak_memory_bytes"] > base["peak_memory_bytes"] * (1 + memory_tolerance):
+            regressions.append(f"{name}: memoria {case['peak_memory_bytes']} bytes (línea base {base['peak_memory_bytes']} bytes)")
+
+    return regressions
+
+def PrintCase(name: str, case: dict) -> None:
+    """
+    Prints the result of one case.
+    """
+    memory = f"{case['peak_memory_bytes'] / 1024 / 1024:.2f} MB" if case["peak_memory_bytes"] is not None else "-"
+    validity = { True: "válida", False: "INVÁLIDA", None: "sin solución" }[case["valid"]]
+    print(f"{name}: {case['execution_time']:.4f} s, {case['expanded_nodes']} nodos, {memory}, {validity}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the performance regression suite and compares it with a baseline.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file (JSON)")
+    parser.add_argument("--update", action="store_true", help="Write the result as the new baseline instead of comparing")
+    parser.add_argument("--case", action="append", help="Run only this case (can be repeated)")
+    parser.add_argument("--repetitions", type=int, default=3, help="Timed runs of every case (the fastest one is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure the peak memory nor check the memory limit of the external engine")
+    parser.add_argument("--no-parallel", action="store_true", help="Do not compare the expanded nodes of HDA* on several workers with A*")
+    parser.add_argument("--midgame", action="store_true", help="Also check the engines on the last positions of the DFS solutions")
+    parser.add_argument("--time-tolerance", type=float, default=0.3, help="Accepted relative increase of the time")
+    parser.add_argument("--nodes-tolerance", type=float, default=0.0, help="Accepted relative increase of the expanded nodes")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="Accepted relative increase of the peak memory")
+    arguments = parser.parse_args()
+    if arguments.repetitions < 1:
+        parser.error("--repetitions must be at least 1")
+
+    cases = [ case for case in CORPUS if arguments.case is None or case["name"] in arguments.case ]
+    result = RunSuite(cases, arguments.repetitions, not arguments.no_memory)
+
+    if arguments.update:
+        with open(arguments.baseline, "w") as file:
+            json.dump(result, file, indent=2)
+        print(f"Línea base guardada en {arguments.baseline}")
+        sys.exit(0)
+
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)
+
+    regressions = Compare(result, baseline, arguments.time_tolerance, arguments.nodes_tolerance, arguments.memory_tolerance)
+    if not arguments.no_parallel:
+        regressions += CheckParallelExpansions()
+    if not arguments.no_memory:
+        regressions += CheckMemoryLimit(cases)
+    regressions += CheckAnytimeRestarts()
+    regressions += CheckPositionCache()
+    exhausted = []
+    if arguments.midgame:
+        failures, exhausted = CheckMidgamePositions(cases)
+        regressions += failures
+    for line in regressions:
+        print(f"Regresión: {line}")
+    for line in exhausted:
+        print(f"Presupuesto agotado: {line}")
+    print("Sin regresiones" if not regressions else f"{len(regressions)} regresiones")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,100 @@
+import json
+from typing import Iterable, TextIO
+from Boards import BoardGeometry, Jump
+
+# Output of the solutions: move notation, compact board rendering and JSON lines
+
+# Rows wider than this are rendered hole by hole instead of with a lookup table
+MAX_TABLE_WIDTH = 12
+
+def HoleName(x: int, y: int) -> str:
+    """
+    Gets the name of a hole in the standard notation: column letter (a is the left one) and row number (1 is the top one).
+
+    Parameters:
+        x (int): The x-coordinate of the hole.
+        y (int): The y-coordinate of the hole.
+
+    Returns:
+        str: The name of the hole, e.g. "d4" for the center of the English board.
+    """
+    return f"{chr(ord('a') + x)}{y + 1}"
+
+def MoveNotation(jump: Jump) -> str:
+    """
+    Gets a move in the standard notation, e.g. "d2-d4".
+    """
+    return f"{HoleName(*jump.from_coord)}-{HoleName(*jump.to_coord)}"
+
+def MoveRecord(number: int, jump: Jump) -> dict:
+    """
+    Gets a move as a dictionary (one line of the JSON lines output).
+
+    Parameters:
+        number (int): The number of the move, starting at 1.
+        jump (Jump): The move.
+
+    Returns:
+        dict: The number, the from, over and to holes and the notation of the move.
+    """
+    return {
+        "move": number,
+        "from": HoleName(*jump.from_coord),
+        "over": HoleName(*jump.over_coord),
+        "to": HoleName(*jump.to_coord),
+        "notation": MoveNotation(jump),
+    }
+
+def WriteJSONLines(records: Iterable[dict], stream: TextIO) -> None:
+    """
+    Writes one JSON object per line, as the records are produced.
+    """
+    for record in records:
+        stream.write(json.dumps(record, separators=(",", ":")))
+        stream.write("\n")
+
+class BoardRenderer:
+    """
+    Class rendering bitboards as text. The holes of a row are consecutive bits of the bitboard,
+    so every row is a lookup in a table with the string of every combination of its pieces.
+    The output is the one of PegSolitaire.PrintGame: " 1" for a piece, " 0" for an empty hole
+    and two spaces outside of the board.
+    """
+
+    def __init__(self, geometry: BoardGeometry) -> None:
+        self.geometry = geometry
+
+        # For every row: first bit, mask of its bits, and its strings (None for the rows rendered hole by hole)
+        self.rows: list[tuple[int, int, list[str]]] = []
+        for y in range(geometry.GAME_SIZE):
+            bits = geometry.cell_index[y]
+            holes = [ bit for bit in bits if bit >= 0 ]
+            shift = min(holes) if holes else 0
+            mask = (1 << len(holes)) - 1
+
+            table = None
+            if len(holes) <= MAX_TABLE_WIDTH:
+                table = [ self.__renderRow(bits, value << shift) for value in range(mask + 1) ]
+            self.rows.append((shift, mask, table))
+
+    def __renderRow(self, bits: list[int], state: int) -> str:
+        return "".join("  " if bit < 0 else (" 1" if (state >> bit) & 1 else " 0") for bit in bits) + "\n"
+
+    def Render(self, state: int) -> str:
+        """
+        Renders a bitboard.
+
+        Parameters:
+            state (int): The bitboard.
+
+        Returns:
+            str: One line per row of the board.
+        """
+        lines = []
+        for y, (shift, mask, table) in enumerate(self.rows):
+            if table is not None:
+                lines.append(table[(state >> shift) & mask])
+            else:
+                lines.append(self.__renderRow(self.geometry.cell_index[y], state))
+
+        return "".join(lines)
@@ -0,0 +1,146 @@
+import time
+import numpy as np
+from numpy.typing import NDArray
+from PegSolitaire import PegSolitaire
+from Pruning import PositionPruning
+from PositionCache import PositionCache
+
+# Offline tool: enumerates every position reachable from the start, layer by layer (one piece less in every layer),
+# and propagates back from the goal which ones can still win. The result is written as a PositionCache file.
+
+class RetrogradeTable:
+    """
+    Class building the full solvability table of a start and a goal.
+    Every layer is a sorted NumPy uint64 array, the children of a whole layer are generated at once
+    with the jump table of the board and deduplicated with np.unique.
+
+    Attributes:
+        game (PegSolitaire): The game (board, start and goal).
+        use_symmetry (bool): Keep only the canonical form of every position (symmetries that keep the goal).
+        use_pruning (bool): Drop the positions rejected by Pruning.PositionPruning while enumerating.
+        chunk_size (int): Number of positions expanded together (bounds the memory of the children).
+        layers (list[NDArray]): Reachable positions of every layer, layer i has i pieces less than the start.
+        solvable (list[NDArray]): Positions of every layer that can reach the goal.
+    """
+
+    def __init__(self, game: PegSolitaire, use_symmetry: bool = True, use_pruning: bool = True, chunk_size: int = 1000000) -> None:
+        if len(game.cell_coords) > 64:
+            raise ValueError("The retrograde table supports boards of up to 64 holes")
+
+        self.game = game
+        self.use_symmetry = use_symmetry
+        self.use_pruning = use_pruning
+        self.chunk_size = chunk_size
+
+        self.start = game.GetGameBitboard()
+        self.goal = game.GetObjetiveBitboard()
+        self.pruning = PositionPruning(game, self.goal) if use_pruning else None
+
+        geometry = game.geometry
+        self.__permutations = geometry.GoalSymmetries(self.goal)[1:] if use_symmetry else []
+
+        self.layers: list[NDArray] = []
+        self.solvable: list[NDArray] = []
+
+    def __canonical(self, states: NDArray) -> NDArray:
+        return self.game.geometry.CanonicalBatch(states, self.__permutations)
+
+    def __children(self, states: NDArray) -> tuple[NDArray, NDArray]:
+        # Every legal jump of every position: (canonical child, index of the parent)
+        parents, moves = self.game.GetLegalMovesBatch(states)
+        children = states[parents] ^ self.game.geometry.move_masks[moves]
+        if self.pruning is not None and len(children) > 0:
+            alive = ~self.pruning.DeadMask(children)
+            children = children[alive]
+            parents = parents[alive]
+
+        return self.__canonical(children), parents
+
+    def Enumerate(self) -> list[NDArray]:
+        """
+        Enumerates the reachable positions layer by layer, down to the number of pieces of the goal.
+
+        Returns:
+            list[NDArray]: The sorted positions of every layer.
+        """
+        self.layers = [ self.__canonical(np.array([ self.start ], dtype=np.uint64)) ]
+        for _ in range(self.start.bit_count() - self.goal.bit_count()):
+            layer = self.layers[-1]
+            chunks = [ np.unique(self.__children(layer[chunk_start:chunk_start + self.chunk_size])[0]) for chunk_start in range(0, len(layer), self.chunk_size) ]
+            nextLayer = np.unique(np.concatenate(chunks))
+
+            self.layers.append(nextLayer)
+            if len(nextLayer) == 0:
+                break
+
+        return self.layers
+
+    def BackPropagate(self) -> list[NDArray]:
+        """
+        Finds the positions of every layer that can reach the goal: the goal itself, and every position
+        with a child that can reach it (from the last layer up to the start).
+
+        Returns:
+            list[NDArray]: The sorted solvable positions of every layer.
+        """
+        goal = self.__canonical(np.array([ self.goal ], dtype=np.uint64))
+        self.solvable = [ np.empty(0, dtype=np.uint64) for _ in self.layers ]
+        self.solvable[-1] = np.intersect1d(self.layers[-1], goal)
+
+        for index in range(len(self.layers) - 2, -1, -1):
+            layer = self.layers[index]
+            nextSolvable = self.solvable[index + 1]
+            if len(nextSolvable) == 0:
+                continue
+
+            found = []
+            for chunk_start in range(0, len(layer), self.chunk_size):
+                children, parents = self.__children(layer[chunk_start:chunk_start + self.chunk_size])
+                positions = np.minimum(np.searchsorted(nextSolvable, children), len(nextSolvable) - 1)
+                found.append(np.unique(parents[nextSolvable[positions] == children]) + chunk_start)
+
+            self.solvable[index] = layer[np.concatenate(found)]
+
+        return self.solvable
+
+    def Build(self) -> dict:
+        """
+        Enumerates the layers and propagates the solvability.
+
+        Returns:
+            dict: Number of reachable and solvable positions of every layer, and the time of every step.
+        """
+        start_time = time.perf_counter()
+        self.Enumerate()
+        enumerate_time = time.perf_counter() - start_time
+        self.BackPropagate()
+
+        return {
+            "reachable": [ len(layer) for layer in self.layers ],
+            "solvable": [ len(layer) for layer in self.solvable ],
+            "enumerate_time": enumerate_time,
+            "propagate_time": time.perf_counter() - start_time - enumerate_time,
+        }
+
+    def WriteTable(self, path: str, include_dead: bool = False) -> PositionCache:
+        """
+        Writes the table as a PositionCache file, so A_Star (cache_path) or PositionCache.IsSolvable
+        can use it. Every lookup is a binary search.
+
+        Parameters:
+            path (str): The file.
+            include_dead (bool): Also store the reachable positions that can not reach the goal
+                (much bigger file; without them, a reachable position that is not solvable is dead).
+
+        Returns:
+            PositionCache: The cache of the file.
+        """
+        # No limit: a position missing from a complete table is dead, evicting a solvable one would make it wrong
+        cache = PositionCache(path, self.game, self.goal, max_entries=None)
+
+        solvable = np.concatenate(self.solvable)
+        dead = np.concatenate([ np.setdiff1d(layer, solvable_layer, assume_unique=True) for layer, solvable_layer in zip(self.layers, self.solvable) ]) if include_dead else np.empty(0, dtype=np.uint64)
+
+        cache.AddArrays(dead, solvable)
+        cache.Save()
+        return cache
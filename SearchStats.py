@@ -0,0 +1,71 @@
+class SearchStats:
+    """
+    Class holding the statistics of a search, returned by the search algorithms.
+
+    Attributes:
+        algorithm (str): The name of the search algorithm.
+        solved (bool): True if the goal was reached.
+        solution_length (int): Number of moves of the solution (None if not solved).
+        budget_exhausted (bool): True if the search was stopped by its node or time budget before finishing.
+        best_pieces (int): Fewest pieces of the positions reached (the pieces of the goal when solved).
+        expanded_nodes (int): Number of nodes expanded (the "Nodos explorados" of the output).
+        generated_nodes (int): Number of children generated (after pruning).
+        duplicate_hits (int): Number of children discarded because their state was already explored or queued with a lower g.
+        stale_entries (int): Number of open list entries skipped because they were outdated (lazy deletion).
+        pruned_nodes (int): Number of children rejected by the pruning rules.
+        cache_hits (int): Number of positions found in the persistent position cache.
+        peak_open_size (int): Maximum size reached by the open list.
+        peak_closed_size (int): Maximum size reached by the close list.
+        elapsed_time (float): Total time of the search in seconds.
+        move_generation_time (float): Time spent generating, pruning and scoring the children.
+        hashing_time (float): Time spent computing the state keys and checking the close list.
+        frontier_time (float): Time spent pushing and popping the open list.
+    """
+
+    def __init__(self, algorithm: str = "A*") -> None:
+        self.algorithm = algorithm
+        self.solved = False
+        self.solution_length: int = None
+        self.budget_exhausted = False
+        self.best_pieces: int = None
+
+        self.expanded_nodes = 0
+        self.generated_nodes = 0
+        self.duplicate_hits = 0
+        self.stale_entries = 0
+        self.pruned_nodes = 0
+        self.cache_hits = 0
+
+        self.peak_open_size = 0
+        self.peak_closed_size = 0
+
+        self.elapsed_time = 0.0
+        self.move_generation_time = 0.0
+        self.hashing_time = 0.0
+        self.frontier_time = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.expanded_nodes / self.elapsed_time if self.elapsed_time > 0 else 0.0
+
+    def AsDict(self) -> dict:
+        """
+        Gets the statistics as a dictionary (e.g. to write them as JSON or CSV).
+
+        Returns:
+            dict: Every attribute plus nodes_per_second.
+        """
+        result = dict(vars(self))
+        result["nodes_per_second"] = self.nodes_per_second
+        return result
+
+    def __repr__(self) -> str:
+        return f"SearchStats({', '.join(f'{key}={value!r}' for key, value in self.AsDict().items())})"
+
+    def PrintStats(self) -> None:
+        """
+        Prints the statistics of the search.
+        """
+        print(f"Nodos expandidos: {self.expanded_nodes}, generados: {self.generated_nodes}, duplicados: {self.duplicate_hits}, podados: {self.pruned_nodes}, en caché: {self.cache_hits}")
+        print(f"Tamaño máximo de la lista abierta: {self.peak_open_size}, de la lista cerrada: {self.peak_closed_size}")
+        print(f"Tiempo: {self.elapsed_time:.6f} s ({self.nodes_per_second:.0f} nodos/s), generación: {self.move_generation_time:.6f} s, hashing: {self.hashing_time:.6f} s, lista abierta: {self.frontier_time:.6f} s")
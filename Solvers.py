@@ -0,0 +1,71 @@
+from AStar_Algorithm import AStar_Algorithm
+from Bidirectional_Algorithm import Bidirectional_Algorithm
+from DFS_Algorithm import DFS_Algorithm
+from ExternalMemory_Algorithm import ExternalMemory_Algorithm
+from HDAStar_Algorithm import HDAStar_Algorithm
+from IDAStar_Algorithm import IDAStar_Algorithm
+from SearchStats import SearchStats
+
+# Search engines by name: the class of the solver and the method that runs the search
+ENGINES = {
+    "astar": (AStar_Algorithm, "A_Star"),
+    "anytime": (AStar_Algorithm, "Anytime_Search"),
+    "beam": (AStar_Algorithm, "Beam_Search"),
+    "idastar": (IDAStar_Algorithm, "IDA_Star"),
+    "dfs": (DFS_Algorithm, "DFS_Search"),
+    "bidirectional": (Bidirectional_Algorithm, "Bidirectional_Search"),
+    "hdastar": (HDAStar_Algorithm, "HDA_Star"),
+    "external": (ExternalMemory_Algorithm, "External_Search"),
+}
+
+# Engines whose search reads and writes the position cache (cache_path): A_Star and the runs of Anytime_Search
+CACHE_ENGINES = { "astar", "anytime" }
+
+def CreateSolver(engine: str = "astar", output_format: str = "boards", **options) -> AStar_Algorithm:
+    """
+    Creates the solver of a search engine.
+
+    Parameters:
+        engine (str): The name of the engine (see ENGINES).
+        output_format (str): "boards", "moves" or "jsonl" (see AStar_Algorithm).
+        options: Arguments of the class of the engine (board, heuristic, use_symmetry, use_pruning...).
+
+    Returns:
+        AStar_Algorithm: The solver, its engine attribute is the name of the engine.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+
+    solver = ENGINES[engine][0](**options)
+    solver.output_format = output_format
+    solver.engine = engine
+    return solver
+
+def RunSolver(solver: AStar_Algorithm, showResult=True, **search_options) -> SearchStats:
+    """
+    Runs the search of a solver created by CreateSolver.
+
+    Parameters:
+        solver (AStar_Algorithm): The solver.
+        showResult (bool): Print the solution and the statistics.
+        search_options: Arguments of the search method of the engine (max_time, max_nodes, beam_width...).
+
+    Returns:
+        SearchStats: The statistics of the search.
+    """
+    return getattr(solver, ENGINES[solver.engine][1])(showResult, **search_options)
+
+def Solve(engine: str = "astar", showResult=True, options: dict = None, **search_options) -> SearchStats:
+    """
+    Solves the game with a search engine selected by name, e.g. Solve("dfs", options={"board": "english"}).
+
+    Parameters:
+        engine (str): The name of the engine (see ENGINES).
+        showResult (bool): Print the solution and the statistics.
+        options (dict): Arguments of CreateSolver.
+        search_options: Arguments of the search method of the engine.
+
+    Returns:
+        SearchStats: The statistics of the search.
+    """
+    return RunSolver(CreateSolver(engine, **(options or {})), showResult, **search_options)
@@ -1,15 +1,10 @@
+import argparse
+import sys
 import time
-import pandas as pd
-import matplotlib.pyplot as plt
-from AStar_Algorithm import AStar_Algorithm
 
-algorithm = AStar_Algorithm()
-
-start_time = time.time()  # Captura el tiempo inicial
-algorithm.A_Star()  # Ejecuta el algoritmo
-end_time = time.time()  # Captura el tiempo final
-
-execution_time = end_time - start_time  # Calcula el tiempo de ejecución
+# Punto de entrada de la línea de comandos: solve, benchmark y enumerate.
+# Los módulos pesados (solvers, NumPy, matplotlib) se importan solo en el comando que los usa,
+# así importar este archivo no ejecuta ninguna búsqueda.
 
 def print_execution_time(execution_time):
   if execution_time >= 3600:
@@ -24,37 +19,143 @@ def print_execution_time(execution_time):
   else:
       print(f"El tiempo de ejecución del algoritmo es: {execution_time:.6f} segundos")
 
-def display_graph():
-  # Para guardar los resutados
-  execution_time = 0
-  results = []
+def display_graph(repetitions=30, csv_path=None, json_path=None, plot=True, options=None, workers=None):
+  # Ejecuta el algoritmo varias veces en paralelo (ver Benchmark.py)
+  import Benchmark
+
+  result = Benchmark.RunBenchmark(options, repetitions=repetitions, workers=workers)
+  Benchmark.PrintSummary(result)
+
+  # Guardar los resultados para compararlos entre versiones
+  if csv_path is not None:
+      Benchmark.WriteCSV(result, csv_path)
+  if json_path is not None:
+      Benchmark.WriteJSON(result, json_path)
+
+  # Generar un gráfico de tiempo de ejecución (matplotlib solo se importa aquí)
+  if plot:
+      Benchmark.PlotResults(result)
+
+def solver_options(arguments):
+  # Solo se pasan las opciones indicadas, así cada motor conserva sus valores por defecto
+  options = { "board": arguments.board }
+  if arguments.heuristic is not None:
+      options["heuristic"] = arguments.heuristic
+  if arguments.symmetry is not None:
+      options["use_symmetry"] = arguments.symmetry
+  if arguments.pruning is not None:
+      options["use_pruning"] = arguments.pruning
+  return options
+
+def solve(arguments):
+  import inspect
+  from Solvers import CACHE_ENGINES, ENGINES, CreateSolver, RunSolver
+
+  options = solver_options(arguments)
+  if arguments.cache is not None:
+      # Se comprueba por la búsqueda del motor: beam usa la clase de A* pero nunca lee la caché
+      if arguments.engine not in CACHE_ENGINES:
+          sys.exit(f"El motor {arguments.engine} no acepta --cache")
+      options["cache_path"] = arguments.cache
+  if arguments.cache_size is not None:
+      if arguments.cache is None:
+          sys.exit("--cache-size necesita --cache")
+      if arguments.cache_size < 0:
+          sys.exit("--cache-size no puede ser negativo")
+      # 0 es sin límite, p. ej. para una tabla de enumerate
+      options["cache_size"] = arguments.cache_size or None
+  if arguments.memory_limit is not None:
+      if "memory_limit" not in inspect.signature(ENGINES[arguments.engine][0]).parameters:
+          sys.exit(f"El motor {arguments.engine} no acepta --memory-limit")
+      options["memory_limit"] = int(arguments.memory_limit * 1024 * 1024)
+  solver = CreateSolver(arguments.engine, arguments.format, **options)
+
+  # Presupuesto de la búsqueda, solo para los motores que lo aceptan
+  search_options = {}
+  parameters = inspect.signature(getattr(solver, ENGINES[arguments.engine][1])).parameters
+  for name in ("max_time", "max_nodes"):
+      value = getattr(arguments, name)
+      if value is None:
+          continue
+      if name not in parameters:
+          sys.exit(f"El motor {arguments.engine} no acepta --{name.replace('_', '-')}")
+      search_options[name] = value
+
+  start_time = time.time()  # Captura el tiempo inicial
+  stats = RunSolver(solver, True, **search_options)  # Ejecuta el algoritmo
+  end_time = time.time()  # Captura el tiempo final
+
+  if arguments.format != "jsonl":
+      print_execution_time(end_time - start_time)
+      print("--------------------------------")
+
+  return 0 if stats.solved else 1
+
+def benchmark(arguments):
+  options = { "engine": arguments.engine, **solver_options(arguments) }
+  display_graph(arguments.repetitions, arguments.csv, arguments.json, arguments.plot, options, arguments.workers)
+  return 0
+
+def enumerate_positions(arguments):
+  from PegSolitaire import PegSolitaire
+  from RetrogradeTable import RetrogradeTable
+
+  table = RetrogradeTable(PegSolitaire(arguments.board), arguments.symmetry is not False, arguments.pruning is not False)
+  summary = table.Build()
+  for removed, (reachable, solvable) in enumerate(zip(summary["reachable"], summary["solvable"])):
+      print(f"{table.start.bit_count() - removed} piezas: {reachable} posiciones, {solvable} resolubles")
+  print(f"Enumeración: {summary['enumerate_time']:.2f} s, propagación: {summary['propagate_time']:.2f} s")
+
+  if arguments.output is not None:
+      table.WriteTable(arguments.output, arguments.include_dead)
+  return 0
+
+def build_parser():
+  # Los nombres de los motores y heurísticas se repiten aquí para no importar los solvers al mostrar la ayuda
+  engines = ["astar", "anytime", "beam", "idastar", "dfs", "bidirectional", "hdastar", "external"]
+  heuristics = ["manhattan", "weighted", "isolated", "combined"]
+
+  common = argparse.ArgumentParser(add_help=False)
+  common.add_argument("--board", default="english", help="Name of the board (see Boards.BOARDS)")
+  common.add_argument("--symmetry", action=argparse.BooleanOptionalAction, default=None, help="Merge the symmetric positions (default of the engine)")
+  common.add_argument("--pruning", action=argparse.BooleanOptionalAction, default=None, help="Drop the positions that can never reach the goal (default of the engine)")
+
+  search = argparse.ArgumentParser(add_help=False)
+  search.add_argument("--engine", default="astar", choices=engines, help="Search engine (see Solvers.ENGINES)")
+  search.add_argument("--heuristic", default=None, choices=heuristics, help="Heuristic (see Heuristics.HEURISTICS, default of the engine)")
 
-  for i in range(30):
-      algorithm = AStar_Algorithm()
+  parser = argparse.ArgumentParser(description="Peg Solitaire solver.")
+  commands = parser.add_subparsers(dest="command", required=True)
 
-      start_time = time.time()  # Captura el tiempo inicial
-      algorithm.A_Star(False)  # Ejecuta el algoritmo
-      end_time = time.time()  # Captura el tiempo final
+  solve_parser = commands.add_parser("solve", parents=[common, search], help="Solve the board")
+  solve_parser.add_argument("--max-time", type=float, help="Time budget in seconds")
+  solve_parser.add_argument("--max-nodes", type=int, help="Budget of expanded nodes")
+  solve_parser.add_argument("--format", default="boards", choices=["boards", "moves", "jsonl"], help="Output of the solution")
+  solve_parser.add_argument("--cache", help="Position cache file (astar and anytime engines only)")
+  solve_parser.add_argument("--cache-size", type=int, help="Maximum number of positions of the cache file, 0 for no limit (default PositionCache.DEFAULT_MAX_ENTRIES)")
+  solve_parser.add_argument("--memory-limit", type=float, help="Memory of the external engine in MB (its layers are kept on disk)")
+  solve_parser.set_defaults(run=solve)
 
-      execution_time = end_time - start_time  # Calcula el tiempo de ejecución
+  benchmark_parser = commands.add_parser("benchmark", parents=[common, search], help="Time repeated solves")
+  benchmark_parser.add_argument("--repetitions", type=int, default=30, help="Number of timed runs")
+  benchmark_parser.add_argument("--workers", type=int, help="Number of worker processes (one per CPU by default)")
+  benchmark_parser.add_argument("--csv", help="Write every run to this CSV file")
+  benchmark_parser.add_argument("--json", help="Write the result to this JSON file")
+  benchmark_parser.add_argument("--plot", action="store_true", help="Plot the execution times (needs matplotlib)")
+  benchmark_parser.set_defaults(run=benchmark)
 
-      # Almacenar los resultados en una lista de diccionarios
-      results.append({
-          'execution_time': execution_time,
-      })
+  enumerate_parser = commands.add_parser("enumerate", parents=[common], help="Build the solvability table of the board")
+  enumerate_parser.add_argument("output", nargs="?", help="File of the table (PositionCache format)")
+  enumerate_parser.add_argument("--include-dead", action="store_true", help="Also store the dead positions")
+  enumerate_parser.set_defaults(run=enumerate_positions)
 
-  # Convertir la lista de resultados a un DataFrame de pandas
-  df = pd.DataFrame(results)
+  return parser
 
-  # Generar un gráfico de tiempo de ejecución
-  plt.figure(figsize=(10, 5))
-  plt.plot(df.index, df['execution_time'], marker='o', linestyle='-', color='b')
-  plt.title('Tiempo de Ejecución del Algoritmo A*')
-  plt.xlabel('Número de ejecuciones')
-  plt.ylabel('Tiempo de Ejecución (segundos)')
-  plt.grid(True)
-  plt.show()
+def main(argv=None):
+  argv = sys.argv[1:] if argv is None else argv
+  # Sin argumentos se resuelve el tablero inglés, como antes
+  arguments = build_parser().parse_args(argv or ["solve"])
+  return arguments.run(arguments)
 
-print_execution_time(execution_time)
-print("--------------------------------")
-# display_graph()
+if __name__ == "__main__":
+  sys.exit(main())